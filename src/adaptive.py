@@ -0,0 +1,90 @@
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+
+class AdaptiveLimiter:
+    """AIMD-регулятор числа одновременных запросов: лимит растет на 1 за "окно"
+    успешных ответов с нормальной задержкой и умножается на backoff при 429/таймаутах"""
+
+    def __init__(self, initial=5, min_limit=1, max_limit=50, backoff=0.5,
+                 latency_target=None, error_threshold=0.2, window=50):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.latency_target = latency_target    # секунд; None — задержку не учитывать
+        self.error_threshold = error_threshold  # доля ошибок в окне, при которой лимит снижается
+        self._limit = float(initial)
+        self._in_flight = 0
+        self._latency = None                    # скользящее среднее задержки (EWMA)
+        self._last_decrease = 0.0
+        self._events = deque(maxlen=window)     # (время, исход) последних запросов
+        self._totals = {"ok": 0, "error": 0, "throttled": 0}
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self):
+        return max(self.min_limit, int(self._limit))
+
+    @property
+    def in_flight(self):
+        return self._in_flight
+
+    def acquire(self):
+        with self._cond:
+            while self._in_flight >= self.limit:
+                self._cond.wait()
+            self._in_flight += 1
+
+    def release(self, latency, outcome="ok"):
+        """outcome: ok / error / throttled (429, таймаут)"""
+        with self._cond:
+            self._in_flight -= 1
+            now = time.monotonic()
+            self._events.append((now, outcome))
+            self._totals[outcome] += 1
+            if outcome == "ok":
+                self._latency = latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+            errors = sum(1 for _, o in self._events if o != "ok") / len(self._events)
+            slow = self.latency_target is not None and self._latency is not None \
+                and self._latency > self.latency_target
+            if outcome == "throttled" or slow or errors > self.error_threshold:
+                # не чаще одного снижения за "круг" запросов, иначе пачка 429 обвалит лимит до минимума
+                if now - self._last_decrease > max(1.0, self._latency or 0):
+                    self._limit = max(self.min_limit, self._limit * self.backoff)
+                    self._last_decrease = now
+            elif outcome == "ok":
+                self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self):
+        """with limiter.slot() as s: ...; s["outcome"] = "throttled" при 429"""
+        self.acquire()
+        state = {"outcome": "ok"}
+        started = time.monotonic()
+        try:
+            yield state
+        except Exception:
+            if state["outcome"] == "ok":
+                state["outcome"] = "error"
+            raise
+        finally:
+            self.release(time.monotonic() - started, state["outcome"])
+
+    def stats(self):
+        """Текущий лимит и наблюдаемые показатели по последним запросам"""
+        with self._cond:
+            events = list(self._events)
+            span = events[-1][0] - events[0][0] if len(events) > 1 else 0
+            n = len(events) or 1
+            return {
+                "limit": self.limit,
+                "in_flight": self._in_flight,
+                "latency": round(self._latency, 3) if self._latency is not None else None,
+                "rps": round(len(events) / span, 2) if span else None,
+                "error_rate": round(sum(1 for _, o in events if o == "error") / n, 3),
+                "throttle_rate": round(sum(1 for _, o in events if o == "throttled") / n, 3),
+                "totals": dict(self._totals),
+            }
@@ -4,14 +4,39 @@ import time
 import json
 from datetime import datetime
 import os
+import threading
 import warnings
+from collections import deque
+from contextlib import closing
+from itertools import chain, islice
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from adaptive import AdaptiveLimiter
+from rate_limit import TokenBucket
+from response_cache import ResponseCache
+from checkpoint import PageCheckpoint
+from columnar import save_frame
+from rawg_transform import count_kept, filter_mask, games_frame, read_games_csv
+from metrics import METRICS
+from multihot import save_labels
+from history import HISTORY_DB, record_snapshot
 warnings.filterwarnings('ignore')
 
 class RAWGDataCollector:
-    def __init__(self, api_key):
+    def __init__(self, api_key, max_workers=4, rate_limit=5.0, use_cache=True,
+                 cache_ttl=7 * 24 * 3600, cache_only=False, export_csv=True):
         self.base_url = "https://api.rawg.io/api"
         self.api_key = api_key
+        self.max_workers = max_workers  # одновременных запросов при постраничной загрузке
+        self.export_csv = export_csv    # единый датасет: кроме Parquet еще и CSV
+        self.bucket = TokenBucket(rate_limit, burst=max_workers)  # запросов в секунду
         self.session = requests.Session()
+        # AIMD-регулятор параллельности: общий для всех запросов коллектора
+        self.limiter = AdaptiveLimiter(initial=2, max_limit=10)
+        # пул соединений под все потоки, чтобы параллельные запросы не открывали новые TCP/TLS
+        adapter = HTTPAdapter(pool_connections=max_workers,
+                              pool_maxsize=max(max_workers * 2, self.limiter.max_limit))
+        self.session.mount('https://', adapter)
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
@@ -19,18 +44,50 @@ class RAWGDataCollector:
         self.data_dir = "rawg_data"
         if not os.path.exists(self.data_dir):
             os.makedirs(self.data_dir)
+        # Кеш ответов API: повторные запуски обработки не тратят квоту; cache_only — без сети
+        self.cache = None
+        if use_cache or cache_only:
+            self.cache = ResponseCache(os.path.join(self.data_dir, "http_cache.sqlite"),
+                                       ttl=cache_ttl, cache_only=cache_only)
+        # загрузка карточек игр: общий пул и Future на каждый id, который сейчас в работе
+        self._detail_pool = ThreadPoolExecutor(max_workers)
+        self._detail_futures = {}
+        self._detail_lock = threading.Lock()
     
-    def make_request(self, endpoint, params=None, max_retries=3):
-        """Базовый метод для выполнения API запросов с повторными попытками"""
+    def make_request(self, endpoint, params=None, max_retries=3, use_cache=True):
+        """Базовый метод для выполнения API запросов с повторными попытками;
+        use_cache=False — не читать кеш (ответ все равно кладется в кеш)"""
         if params is None:
             params = {}
         
+        if self.cache and (use_cache or self.cache.cache_only):
+            cached = self.cache.get(endpoint, params)
+            if cached is not None:
+                METRICS.inc('api_cache_total', result='hit')
+                return cached
+            METRICS.inc('api_cache_total', result='miss')
+            if self.cache.cache_only:
+                print(f"Нет в кеше (офлайн-режим): {endpoint} {params}")
+                return None
+        
         params['key'] = self.api_key
         url = f"{self.base_url}/{endpoint}"
         
         for attempt in range(max_retries):
             try:
-                response = self.session.get(url, params=params, timeout=15)
+                self.bucket.acquire()
+                with self.limiter.slot() as slot, METRICS.timer('api_request', endpoint=endpoint.split('/')[0]):
+                    try:
+                        response = self.session.get(url, params=params, timeout=15)
+                    except requests.exceptions.Timeout:
+                        slot['outcome'] = 'throttled'
+                        METRICS.inc('api_requests_total', status='timeout')
+                        raise
+                    METRICS.inc('api_requests_total', status=response.status_code)
+                    if response.status_code == 429:
+                        slot['outcome'] = 'throttled'
+                    elif response.status_code >= 500:
+                        slot['outcome'] = 'error'
                 # Проверка на лимит запросов
                 if response.status_code == 429:
                     retry_after = int(response.headers.get('Retry-After', 60))
@@ -39,7 +96,10 @@ class RAWGDataCollector:
                     continue
                 
                 response.raise_for_status()
-                return response.json()
+                data = response.json()
+                if self.cache:
+                    self.cache.put(endpoint, params, data)
+                return data
             except requests.exceptions.RequestException as e:
                 print(f"Попытка {attempt + 1}/{max_retries} не удалась для {url}: {e}")
                 if attempt < max_retries - 1:
@@ -75,69 +135,71 @@ class RAWGDataCollector:
         return filepath
     
     def create_unified_dataset(self, results):
-        """Создание единого датасета в формате CSV из всех собранных данных"""
-        if not results['games']:
+        """Создание единого датасета из всех собранных данных: Parquet с явной схемой
+        (columnar.RAWG_FIELDS), CSV — дополнительно при export_csv"""
+        if results.get('games') is None or len(results['games']) == 0:
             print("Нет данных об играх для объединения")
             return None
         
         try:
-            print("СОЗДАНИЕ ЕДИНОГО ДАТАСЕТА В ФОРМАТЕ CSV")
+            print("СОЗДАНИЕ ЕДИНОГО ДАТАСЕТА В ФОРМАТЕ PARQUET")
 
             
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             unified_files = []
             
-            # 1. создание csv файла для игр 
-            if results.get('games'):
-                games_filename = f"unified_games_{timestamp}.csv"
-                games_filepath = os.path.join(self.data_dir, games_filename)
+            # 1. игры: Parquet (и CSV при export_csv); жанры/магазины/теги — еще и битовые матрицы .labels.npz
+            if len(results['games']):
+                games_filename = f"unified_games_{timestamp}.parquet"
+                games_filepath = os.path.join(self.data_dir, f"unified_games_{timestamp}")
                 df_games = pd.DataFrame(results['games'])
-                df_games.to_csv(games_filepath, index=False, encoding='utf-8-sig')
+                save_frame(df_games, games_filepath, export_csv=self.export_csv)
+                save_labels(df_games, games_filepath)
                 print(f"Сохранено: {len(df_games)} игр в файле {games_filename}")
                 unified_files.append(games_filename)
             
-            # 2. cоздание csv файла для жанров
+            # 2. жанры: Parquet (и CSV при export_csv)
             if results.get('genres'):
-                genres_filename = f"unified_genres_{timestamp}.csv"
-                genres_filepath = os.path.join(self.data_dir, genres_filename)
+                genres_filename = f"unified_genres_{timestamp}.parquet"
+                genres_filepath = os.path.join(self.data_dir, f"unified_genres_{timestamp}")
                 df_genres = pd.DataFrame(results['genres'])
-                df_genres.to_csv(genres_filepath, index=False, encoding='utf-8-sig')
+                save_frame(df_genres, genres_filepath, export_csv=self.export_csv)
                 print(f"Сохранено: {len(df_genres)} жанров в файле {genres_filename}")
                 unified_files.append(genres_filename)
             
-            # 3. создание csv файла для платформ
+            # 3. платформы: Parquet (и CSV при export_csv)
             if results.get('platforms'):
-                platforms_filename = f"unified_platforms_{timestamp}.csv"
-                platforms_filepath = os.path.join(self.data_dir, platforms_filename)
+                platforms_filename = f"unified_platforms_{timestamp}.parquet"
+                platforms_filepath = os.path.join(self.data_dir, f"unified_platforms_{timestamp}")
                 df_platforms = pd.DataFrame(results['platforms'])
-                df_platforms.to_csv(platforms_filepath, index=False, encoding='utf-8-sig')
+                save_frame(df_platforms, platforms_filepath, export_csv=self.export_csv)
                 print(f"Сохранено: {len(df_platforms)} платформ в файле {platforms_filename}")
                 unified_files.append(platforms_filename)
             
-            # 4. создание csv файла для разработчиков
+            # 4. разработчики: Parquet (и CSV при export_csv)
             if results.get('developers'):
-                developers_filename = f"unified_developers_{timestamp}.csv"
-                developers_filepath = os.path.join(self.data_dir, developers_filename)
+                developers_filename = f"unified_developers_{timestamp}.parquet"
+                developers_filepath = os.path.join(self.data_dir, f"unified_developers_{timestamp}")
                 df_developers = pd.DataFrame(results['developers'])
-                df_developers.to_csv(developers_filepath, index=False, encoding='utf-8-sig')
+                save_frame(df_developers, developers_filepath, export_csv=self.export_csv)
                 print(f"Сохранено: {len(df_developers)} разработчиков в файле {developers_filename}")
                 unified_files.append(developers_filename)
             
-            # 5. создание csv файла для магазинов
+            # 5. магазины: Parquet (и CSV при export_csv)
             if results.get('stores'):
-                stores_filename = f"unified_stores_{timestamp}.csv"
-                stores_filepath = os.path.join(self.data_dir, stores_filename)
+                stores_filename = f"unified_stores_{timestamp}.parquet"
+                stores_filepath = os.path.join(self.data_dir, f"unified_stores_{timestamp}")
                 df_stores = pd.DataFrame(results['stores'])
-                df_stores.to_csv(stores_filepath, index=False, encoding='utf-8-sig')
+                save_frame(df_stores, stores_filepath, export_csv=self.export_csv)
                 print(f" Сохранено: {len(df_stores)} магазинов в файле {stores_filename}")
                 unified_files.append(stores_filename)
             
-            print(f"\n Все CSV файлы успешно сохранены в директорию: {self.data_dir}")
+            print(f"\n Все файлы успешно сохранены в директорию: {self.data_dir}")
             for file in unified_files:
                 print(f"- {file}")
             
             return {
-                'games_file': games_filename if results.get('games') else None,
+                'games_file': games_filename,
                 'genres_file': genres_filename if results.get('genres') else None,
                 'platforms_file': platforms_filename if results.get('platforms') else None,
                 'developers_file': developers_filename if results.get('developers') else None,
@@ -149,12 +211,113 @@ class RAWGDataCollector:
             print(f"Ошибка при создании единого датасета: {e}")
             return None
     
+    def _games_params(self, page, page_size=40):
+        """Параметры запроса страницы игр с фильтрами"""
+        return {
+            'page_size': page_size,
+            'page': page,
+            'ordering': '-metacritic,-rating',  # сначала игры с высоким рейтингом
+            'dates': '1970-01-01,2024-12-31',  # диапазон дат
+            'ratings_count': '5,'  # минимум 5 оценок
+        }
+    
+    def _process_game(self, game):
+        """Фильтрация одной игры из ответа API; None — игра отброшена.
+        Построчный вариант games_frame — оставлен для сравнения в rawg_transform.benchmark"""
+        try:
+            # Проверяем, является ли игра тестовой
+            game_name = game.get('name', '').lower()
+            game_slug = game.get('slug', '').lower()
+            
+            # Фильтрация тестовых игр
+            test_keywords = ['test', 'demo', 'prototype', 'sample', 'template', 'debug', 'trash', 'junk', 'example']
+            if any(keyword in game_name or keyword in game_slug for keyword in test_keywords):
+                return None
+            
+            # Пропускаем игры с подозрительными датами (в будущем)
+            released = game.get('released', '')
+            if released and (released.startswith(('203', '204', '205', '206', '207', '208', '209'))):
+                return None
+            
+            # Пропускаем игры без необходимых данных
+            if not game.get('id') or not game.get('name') or not game.get('released'):
+                return None
+            
+            # Пропускаем игры с нулевыми рейтингами
+            if game.get('rating', 0) == 0 and game.get('metacritic', 0) == 0:
+                return None
+            
+            # Пропускаем игры с очень низким количеством оценок
+            if game.get('ratings_count', 0) < 5:
+                return None
+            
+            # Собираем информацию об игре
+            genres = self.safe_get_list(game, 'genres')
+            platforms = self.safe_get_list(game, 'platforms')
+            stores = self.safe_get_list(game, 'stores')
+            tags = self.safe_get_list(game, 'tags')
+            esrb_rating = self.safe_get(game, 'esrb_rating', {})
+            
+            game_info = {
+                'id': game.get('id'),
+                'name': game.get('name'),
+                'slug': game.get('slug'),
+                'released': game.get('released'),
+                'tba': game.get('tba', False),
+                'rating': game.get('rating', 0),
+                'rating_top': game.get('rating_top', 0),
+                'ratings_count': game.get('ratings_count', 0),
+                'metacritic': game.get('metacritic'),
+                'playtime': game.get('playtime', 0),
+                'platforms_count': len(platforms),
+                'genres': ', '.join([self.safe_get(genre, 'name', '') for genre in genres if self.safe_get(genre, 'name', '')]),
+                'stores': ', '.join([self.safe_get(store.get('store', {}), 'name', '') for store in stores if self.safe_get(store.get('store', {}), 'name', '')]),
+                'tags': ', '.join([self.safe_get(tag, 'name', '') for tag in tags[:5] if self.safe_get(tag, 'name', '')]),
+                'esrb_rating': self.safe_get(esrb_rating, 'name', ''),
+                'background_image': game.get('background_image', ''),
+                'added': game.get('added', 0),
+                'suggestions_count': game.get('suggestions_count', 0),
+                'updated': datetime.now().isoformat()
+            }
+            
+            # Удаляем пустые значения для лучшей читаемости
+            for key, value in list(game_info.items()):
+                if value in ['', None, [], {}]:
+                    game_info[key] = 'N/A'
+            
+            return game_info
+        except Exception as e:
+            print(f"Ошибка при обработке игры: {e}")
+            return None
+    
+    def fetch_pages_ordered(self, endpoint, make_params, pages, use_cache=True):
+        """Параллельная загрузка страниц (не больше max_workers одновременно, не чаще rate_limit
+        в секунду) с выдачей (page, data) строго в порядке номеров страниц"""
+        pages = iter(pages)
+        window = deque()
+        submit = lambda ex, page: ex.submit(self.make_request, endpoint, make_params(page), use_cache=use_cache)
+        with ThreadPoolExecutor(self.max_workers) as ex:
+            try:
+                for page in islice(pages, self.max_workers * 2):
+                    window.append((page, submit(ex, page)))
+                while window:
+                    page, future = window.popleft()
+                    data = future.result()
+                    next_page = next(pages, None)
+                    if next_page is not None:
+                        window.append((next_page, submit(ex, next_page)))
+                    yield page, data
+            finally:
+                # потребитель остановился раньше (набрали target_count) — лишние страницы не грузим
+                for _, future in window:
+                    future.cancel()
+    
     # ЗАПРОС 1: Сбор игр
     def collect_5k_games(self):
         """Сбор 5,000 игр с пагинацией и фильтрацией тестовых данных"""
         print("\n ЗАПРОС 1: СБОР ИГР ")
+        started = datetime.now()
         all_games = []
-        current_page = 1
         target_count = 5000
         games_per_page = 40
         
@@ -169,126 +332,71 @@ class RAWGDataCollector:
         print("- Минимум 5 оценок")
         print("- Игнорируем игры с подозрительными датами")
         
-        while current_page <= total_pages and len(all_games) < target_count:
-            print(f"Запрос страницы {current_page}/{total_pages}... Собрано игр: {len(all_games)}/{target_count}")
-            
-            # Параметры запроса с фильтрами
-            params = {
-                'page_size': games_per_page,
-                'page': current_page,
-                'ordering': '-metacritic,-rating',  # сначала игры с высоким рейтингом
-                'dates': '1970-01-01,2024-12-31',  # диапазон дат
-                'ratings_count': '5,'  # минимум 5 оценок
-            }
-            
-            data = self.make_request("games", params)
-            if not data:
-                print(f"Ошибка при получении страницы {current_page}. Пропускаем...")
-                current_page += 1
-                time.sleep(1)
-                continue
-            
-            results = data.get('results', [])
-            if not results:
-                print("Получены пустые результаты, стоп сбор.")
-                break
-            
-            for game in results:
-                try:
-                    # Проверяем, является ли игра тестовой
-                    game_name = game.get('name', '').lower()
-                    game_slug = game.get('slug', '').lower()
-                    
-                    # Фильтрация тестовых игр
-                    test_keywords = ['test', 'demo', 'prototype', 'sample', 'template', 'debug', 'trash', 'junk', 'example']
-                    if any(keyword in game_name or keyword in game_slug for keyword in test_keywords):
-                        continue
-                    
-                    # Пропускаем игры с подозрительными датами (в будущем)
-                    released = game.get('released', '')
-                    if released and (released.startswith(('203', '204', '205', '206', '207', '208', '209'))):
-                        continue
-                    
-                    # Пропускаем игры без необходимых данных
-                    if not game.get('id') or not game.get('name') or not game.get('released'):
-                        continue
-                    
-                    # Пропускаем игры с нулевыми рейтингами
-                    if game.get('rating', 0) == 0 and game.get('metacritic', 0) == 0:
-                        continue
-                    
-                    # Пропускаем игры с очень низким количеством оценок
-                    if game.get('ratings_count', 0) < 5:
-                        continue
-                    
-                    # Собираем информацию об игре
-                    genres = self.safe_get_list(game, 'genres')
-                    platforms = self.safe_get_list(game, 'platforms')
-                    stores = self.safe_get_list(game, 'stores')
-                    tags = self.safe_get_list(game, 'tags')
-                    esrb_rating = self.safe_get(game, 'esrb_rating', {})
-                    
-                    game_info = {
-                        'id': game.get('id'),
-                        'name': game.get('name'),
-                        'slug': game.get('slug'),
-                        'released': game.get('released'),
-                        'tba': game.get('tba', False),
-                        'rating': game.get('rating', 0),
-                        'rating_top': game.get('rating_top', 0),
-                        'ratings_count': game.get('ratings_count', 0),
-                        'metacritic': game.get('metacritic'),
-                        'playtime': game.get('playtime', 0),
-                        'platforms_count': len(platforms),
-                        'genres': ', '.join([self.safe_get(genre, 'name', '') for genre in genres if self.safe_get(genre, 'name', '')]),
-                        'stores': ', '.join([self.safe_get(store.get('store', {}), 'name', '') for store in stores if self.safe_get(store.get('store', {}), 'name', '')]),
-                        'tags': ', '.join([self.safe_get(tag, 'name', '') for tag in tags[:5] if self.safe_get(tag, 'name', '')]),
-                        'esrb_rating': self.safe_get(esrb_rating, 'name', ''),
-                        'background_image': game.get('background_image', ''),
-                        'added': game.get('added', 0),
-                        'suggestions_count': game.get('suggestions_count', 0),
-                        'updated': datetime.now().isoformat()
-                    }
-                    
-                    # Удаляем пустые значения для лучшей читаемости
-                    for key, value in list(game_info.items()):
-                        if value in ['', None, [], {}]:
-                            game_info[key] = 'N/A'
-                    
-                    all_games.append(game_info)
-                    
-                    # проверка  цели
-                    if len(all_games) >= target_count:
-                        break
-                except Exception as e:
-                    print(f"Ошибка при обработке игры: {e}")
+        # Чекпоинт: сырые записи каждой страницы дописываются одной строкой JSONL,
+        # после падения сбор продолжается со следующей страницы
+        checkpoint = PageCheckpoint(os.path.join(self.data_dir, "games_checkpoint.jsonl"),
+                                    run_key=self._games_params(0, games_per_page) | {'target': target_count, 'raw': True})
+        last_page, raw_games = checkpoint.load()
+        kept = count_kept(raw_games)
+        if last_page:
+            print(f"Продолжаем со страницы {last_page + 1}: уже собрано {kept} игр")
+            # страницы из чекпоинта загружены в прошлом запуске — точка синхронизации берется от его начала
+            if checkpoint.started:
+                started = datetime.fromisoformat(checkpoint.started)
+        checkpoint.started = started.isoformat()
+        
+        # кеш не читается: иначе в сбор попадут ответы недельной давности, а точка синхронизации
+        # (время начала сбора) окажется новее данных, и sync_updated_games пропустит изменения
+        # closing: при выходе из цикла (break, исключение) генератор закрывается сразу
+        # и отменяет загрузку оставшихся страниц окна, не дожидаясь сборщика мусора
+        with closing(self.fetch_pages_ordered("games", lambda page: self._games_params(page, games_per_page),
+                                              range(last_page + 1, total_pages + 1), use_cache=False)) as pages:
+            for current_page, data in pages:
+                if kept >= target_count:
+                    break
+                print(f"Страница {current_page}/{total_pages}... Собрано игр: {kept}/{target_count}")
+                if not data:
+                    print(f"Ошибка при получении страницы {current_page}. Пропускаем...")
+                    checkpoint.append(current_page, [])
                     continue
             
-            current_page += 1
+                results = data.get('results', [])
+                if not results:
+                    print("Получены пустые результаты, стоп сбор.")
+                    break
             
-            # сохранение промежуточные результаты каждые 5 страниц
-            if current_page % 5 == 0:
-                self.save_to_file(all_games, f"games_partial_{len(all_games)}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
-            
-            # задержка для соблюдения лимитов API
-            time.sleep(0.7)
-        
-        # сохранение всех собранных игр
+                # страницы приходят строго по порядку, поэтому обрезка до target_count детерминирована:
+                # последняя страница обрезается сразу после игры, которая добирает target_count
+                mask = filter_mask(results)
+                if kept + mask.sum() > target_count:
+                    results = results[:int((mask.cumsum() < target_count - kept).sum()) + 1]
+                    mask = mask[:len(results)]
+                kept += int(mask.sum())
+                raw_games.extend(results)
+                checkpoint.append(current_page, results)
+        checkpoint.finish()
+        
+        # преобразование всех страниц одним пакетом в типизированную таблицу
+        with METRICS.timer('games_transform'):
+            all_games = games_frame(raw_games, updated=started)
+        
+        # сохранение сырых ответов и таблицы игр
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.save_to_file(all_games, f"games_5k_{timestamp}.json")
+        self.save_to_file(raw_games, f"games_5k_raw_{timestamp}.json")
         
-        # также сохраняем в csv 
         csv_filename = f"games_5k_{timestamp}.csv"
-        df = pd.DataFrame(all_games)
-        df.to_csv(os.path.join(self.data_dir, csv_filename), index=False, encoding='utf-8-sig')
+        all_games.to_csv(os.path.join(self.data_dir, csv_filename), index=False, encoding='utf-8-sig')
+        # жанры/магазины/теги битовыми матрицами — для сегментных выборок без разбора строк
+        save_labels(all_games, os.path.join(self.data_dir, csv_filename))
         print(f"Данные также сохранены в CSV: {csv_filename}")
+        # точка отсчета для sync_updated_games: все, что обновится после начала полного сбора
+        self.save_sync_point(started)
+        # снимок метрик в историю: только изменившиеся значения, плюс недельная скорость
+        record_snapshot(all_games, started, HISTORY_DB)
         
         # вывод статистики по собранным данным
-        if all_games:
-            filled_fields = {}
-            for field in all_games[0].keys():
-                filled_count = sum(1 for game in all_games if game.get(field) not in [None, '', 'N/A', 0])
-                filled_fields[field] = filled_count
+        if len(all_games):
+            filled_fields = (all_games.notna() & all_games.ne(0)).sum()
             
             print("\nСтатистика заполненности полей:")
             for field, count in filled_fields.items():
@@ -298,22 +406,210 @@ class RAWGDataCollector:
         print(f"\nСбор завершен! Всего собрано игр: {len(all_games)}")
         return all_games
     
+    def load_sync_point(self):
+        """Время последней синхронизации игр (datetime) или None, если полного сбора еще не было"""
+        path = os.path.join(self.data_dir, "sync_state.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding='utf-8') as f:
+            return datetime.fromisoformat(json.load(f)['last_sync'])
+    
+    def save_sync_point(self, moment):
+        path = os.path.join(self.data_dir, "sync_state.json")
+        tmp = path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'last_sync': moment.isoformat(timespec='seconds')}, f)
+        os.replace(tmp, path)
+    
+    def latest_games_file(self):
+        """Самый свежий CSV с играми: результат полного сбора или прошлой синхронизации"""
+        files = [os.path.join(self.data_dir, f) for f in os.listdir(self.data_dir)
+                 if f.startswith(('games_5k_', 'games_sync_')) and f.endswith('.csv')]
+        return max(files, key=os.path.getmtime) if files else None
+    
+    def sync_updated_games(self, dataset_path=None):
+        """Дельта-синхронизация: запрашиваются только игры, обновленные в RAWG после
+        последней синхронизации (фильтр updated, сортировка -updated), и по id
+        заменяют строки в существующем датасете. Стоимость зависит от числа изменений,
+        а не от размера каталога"""
+        print("\n СИНХРОНИЗАЦИЯ ОБНОВЛЕННЫХ ИГР ")
+        since = self.load_sync_point()
+        dataset_path = dataset_path or self.latest_games_file()
+        if since is None or dataset_path is None:
+            print("Нет точки синхронизации или датасета — сначала выполните collect_5k_games()")
+            return None
+        started = datetime.now()
+        games_per_page = 40
+        
+        def make_params(page):
+            params = self._games_params(page, games_per_page)
+            # фильтр RAWG по дате обновления с точностью до дня: день since захватывается повторно,
+            # но upsert по id идемпотентен
+            params['updated'] = f"{since:%Y-%m-%d},{started:%Y-%m-%d}"
+            params['ordering'] = '-updated'
+            return params
+        
+        first = self.make_request("games", make_params(1), use_cache=False)
+        if first is None:
+            print("Не удалось получить первую страницу, синхронизация отменена")
+            return None
+        total_pages = -(-first.get('count', 0) // games_per_page)
+        print(f"Изменено с {since:%Y-%m-%d}: {first.get('count', 0)} игр, страниц: {total_pages}")
+        
+        raw_games = []
+        # при досрочном return генератор закрывается и отменяет загрузку остальных страниц
+        with closing(self.fetch_pages_ordered("games", make_params, range(2, total_pages + 1),
+                                              use_cache=False)) as rest:
+            for current_page, data in chain([(1, first)], rest):
+                if not data:
+                    # без этой страницы синхронизация неполная: точку отсчета не сдвигаем
+                    print(f"Ошибка при получении страницы {current_page}, синхронизация отменена")
+                    return None
+                raw_games.extend(data.get('results', []))
+        
+        changed = games_frame(raw_games, updated=started).drop_duplicates('id')
+        # игры, которые больше не проходят фильтры, убираются из датасета
+        dropped = {g['id'] for g in raw_games if g.get('id')} - set(changed['id'])
+        
+        df = read_games_csv(dataset_path)
+        known = set(df['id'])
+        df = df[~df['id'].isin(dropped | set(changed['id']))]
+        if len(changed):
+            df = pd.concat([df, changed], ignore_index=True)
+        
+        timestamp = started.strftime("%Y%m%d_%H%M%S")
+        csv_filename = f"games_sync_{timestamp}.csv"
+        df.to_csv(os.path.join(self.data_dir, csv_filename), index=False, encoding='utf-8-sig')
+        save_labels(df, os.path.join(self.data_dir, csv_filename))
+        self.save_sync_point(started)
+        record_snapshot(df, started, HISTORY_DB)
+        
+        updated = len(known & set(changed['id']))
+        print(f"Обновлено: {updated}, добавлено: {len(changed) - updated}, "
+              f"удалено: {len(known & dropped)}. Всего игр: {len(df)}")
+        print(f"Датасет сохранен: {csv_filename}")
+        return df
+    
+    def fetch_game_detail(self, game_id):
+        """Future с ответом /games/{id}; одновременные запросы одного id разделяют один Future"""
+        with self._detail_lock:
+            future = self._detail_futures.get(game_id)
+            if future is None:
+                future = self._detail_pool.submit(self.make_request, f"games/{game_id}")
+                self._detail_futures[game_id] = future
+                future.add_done_callback(lambda f, gid=game_id: self._forget_detail(gid))
+            return future
+    
+    def _forget_detail(self, game_id):
+        with self._detail_lock:
+            self._detail_futures.pop(game_id, None)
+    
+    def enrich_games(self, game_ids=None):
+        """Обогащение игр разработчиками и издателями из /games/{id}.
+        Готовые игры дописываются в game_details.jsonl, повторный запуск их пропускает.
+        Результат — связи game_developers / game_publishers и справочники developers / publishers"""
+        print("\n ОБОГАЩЕНИЕ ИГР: РАЗРАБОТЧИКИ И ИЗДАТЕЛИ ")
+        if game_ids is None:
+            games_file = self.latest_games_file()
+            if games_file is None:
+                print("Нет датасета игр — сначала выполните collect_5k_games()")
+                return None
+            game_ids = pd.read_csv(games_file, encoding='utf-8-sig')['id'].tolist()
+        game_ids = list(dict.fromkeys(int(i) for i in game_ids))
+        
+        details_path = os.path.join(self.data_dir, "game_details.jsonl")
+        details = {}
+        if os.path.exists(details_path):
+            with open(details_path, 'r+b') as f:
+                offset = 0
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break   # строка, недописанная при падении, — отрезаем
+                    details[record['id']] = record
+                    offset += len(line)
+                f.truncate(offset)
+        todo = [i for i in game_ids if i not in details]
+        print(f"Игр: {len(game_ids)}, уже обогащено: {len(game_ids) - len(todo)}, осталось: {len(todo)}")
+        
+        started = time.monotonic()
+        failed = 0
+        with open(details_path, 'a', encoding='utf-8') as out:
+            futures = {self.fetch_game_detail(game_id): game_id for game_id in todo}
+            for n, future in enumerate(as_completed(futures), 1):
+                game_id = futures[future]
+                data = future.result()
+                if not data:
+                    failed += 1
+                    continue
+                record = {
+                    'id': game_id,
+                    'developers': [{k: d.get(k) for k in ('id', 'name', 'slug', 'games_count')}
+                                   for d in self.safe_get_list(data, 'developers')],
+                    'publishers': [{k: p.get(k) for k in ('id', 'name', 'slug', 'games_count')}
+                                   for p in self.safe_get_list(data, 'publishers')],
+                }
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                details[game_id] = record
+                if n % 200 == 0:
+                    print(f"Обработано {n}/{len(todo)}: {n / (time.monotonic() - started):.1f} игр/с")
+        elapsed = time.monotonic() - started
+        
+        tables = {}
+        for kind in ('developers', 'publishers'):
+            links, entities = [], {}
+            for game_id in game_ids:
+                for entity in details.get(game_id, {}).get(kind, []):
+                    links.append({'game_id': game_id, f"{kind[:-1]}_id": entity['id']})
+                    entities[entity['id']] = entity
+            tables[f"game_{kind}"] = pd.DataFrame(links, columns=['game_id', f"{kind[:-1]}_id"])
+            tables[kind] = pd.DataFrame(list(entities.values()), columns=['id', 'name', 'slug', 'games_count'])
+        for name, df in tables.items():
+            df.to_csv(os.path.join(self.data_dir, f"{name}.csv"), index=False, encoding='utf-8-sig')
+            print(f"Сохранено: {len(df)} строк в {name}.csv")
+        
+        if todo:
+            print(f"Загружено {len(todo) - failed} игр за {elapsed:.1f} с "
+                  f"({(len(todo) - failed) / elapsed:.1f} игр/с), ошибок: {failed}")
+        return tables
+    
+    def collect_all_pages(self, endpoint, params, max_pages=None, page_size=40):
+        """Все элементы списочного endpoint: первая страница дает count,
+        остальные грузятся параллельно через fetch_pages_ordered"""
+        make_params = lambda page: dict(params, page=page, page_size=page_size)
+        first = self.make_request(endpoint, make_params(1))
+        if not first:
+            return []
+        total_pages = -(-first.get('count', 0) // page_size)
+        if max_pages:
+            total_pages = min(total_pages, max_pages)
+        items = list(first.get('results', []))
+        with closing(self.fetch_pages_ordered(endpoint, make_params, range(2, total_pages + 1))) as pages:
+            for page, data in pages:
+                if not data:
+                    print(f"{endpoint}: ошибка при получении страницы {page}. Пропускаем...")
+                    continue
+                items.extend(data.get('results', []))
+        print(f"{endpoint}: получено {len(items)} из {first.get('count', 0)} ({total_pages} стр.)")
+        return items
+    
     # ЗАПРОС 2: Данные о жанрах
-    def collect_genres(self):
-        """Сбор данных о жанрах"""
+    def collect_genres(self, max_pages=None):
+        """Сбор данных о жанрах (все страницы; max_pages — ограничение)"""
         print("\n ЗАПРОС 2: СБОР ДАННЫХ О ЖАНРАХ ")
         
         params = {
-            'page_size': 20,  # Максимальное количество жанров
             'ordering': '-games_count'  # Сортировка по популярности
         }
         
-        data = self.make_request("genres", params)
-        if not data:
+        results = self.collect_all_pages("genres", params, max_pages)
+        if not results:
             return []
         
         genres_data = []
-        for genre in data.get('results', []):
+        for genre in results:
             try:
                 genre_info = {
                     'id': genre.get('id'),
@@ -331,21 +627,20 @@ class RAWGDataCollector:
         return genres_data
     
     # ЗАПРОС 3: Данные о платформах
-    def collect_platforms(self):
-        """Сбор данных о платформах"""
+    def collect_platforms(self, max_pages=None):
+        """Сбор данных о платформах (все страницы; max_pages — ограничение)"""
         print("\n ЗАПРОС 3: СБОР ДАННЫХ О ПЛАТФОРМАХ ")
         
         params = {
-            'page_size': 20,  # Максимальное количество платформ
             'ordering': '-games_count'  # Сортировка по популярности
         }
         
-        data = self.make_request("platforms", params)
-        if not data:
+        results = self.collect_all_pages("platforms", params, max_pages)
+        if not results:
             return []
         
         platforms_data = []
-        for platform in data.get('results', []):
+        for platform in results:
             try:
                 platform_info = {
                     'id': platform.get('id'),
@@ -363,21 +658,21 @@ class RAWGDataCollector:
         return platforms_data
     
     # ЗАПРОС 4: Данные о разработчиках
-    def collect_developers(self):
-        """Сбор данных о разработчиках"""
+    def collect_developers(self, max_pages=25):
+        """Сбор данных о разработчиках: самые крупные по числу игр, max_pages страниц по 40
+        (в /developers сотни тысяч записей; max_pages=None — все страницы)"""
         print("\n  ЗАПРОС 4: СБОР ДАННЫХ О РАЗРАБОТЧИКАХ ")
         
         params = {
-            'page_size': 20,  # Максимальное количество разработчиков
             'ordering': '-games_count'  # Сортировка по популярности
         }
         
-        data = self.make_request("developers", params)
-        if not data:
+        results = self.collect_all_pages("developers", params, max_pages)
+        if not results:
             return []
         
         developers_data = []
-        for developer in data.get('results', []):
+        for developer in results:
             try:
                 dev_info = {
                     'id': developer.get('id'),
@@ -395,20 +690,16 @@ class RAWGDataCollector:
         return developers_data
     
     # ЗАПРОС 5: Данные о магазинах
-    def collect_stores(self):
-        """Сбор данных о магазинах"""
+    def collect_stores(self, max_pages=None):
+        """Сбор данных о магазинах (все страницы; max_pages — ограничение)"""
         print("\n ЗАПРОС 5: СБОР ДАННЫХ О МАГАЗИНАХ ")
         
-        params = {
-            'page_size': 20  # Максимальное количество магазинов
-        }
-        
-        data = self.make_request("stores", params)
-        if not data:
+        results = self.collect_all_pages("stores", {}, max_pages)
+        if not results:
             return []
         
         stores_data = []
-        for store in data.get('results', []):
+        for store in results:
             try:
                 store_info = {
                     'id': store.get('id'),
@@ -429,23 +720,16 @@ class RAWGDataCollector:
         """Выполнение всех 5 запросов к API"""
         print("СБОР ИГР И ДАННЫХ С RAWG API")
         
-        # Запрос 1: Сбор игр
-        games = self.collect_5k_games()
-        
-        # Остальные запросы (выполняются после сбора игр)
-        print("\nВыполнение остальных 4 запросов к разным endpoint...")
-        
-        # Запрос 2: Жанры
-        genres = self.collect_genres()
-        
-        # Запрос 3: Платформы
-        platforms = self.collect_platforms()
-        
-        # Запрос 4: Разработчики
-        developers = self.collect_developers()
-        
-        # Запрос 5: Магазины
-        stores = self.collect_stores()
+        # Все 5 запросов выполняются одновременно: общий TokenBucket и AIMD-регулятор
+        # держат суммарную нагрузку на API, а время сбора — примерно как у самого долгого запроса
+        with ThreadPoolExecutor(5) as ex:
+            games = ex.submit(self.collect_5k_games)                 # Запрос 1: Сбор игр
+            genres = ex.submit(self.collect_genres)                  # Запрос 2: Жанры
+            platforms = ex.submit(self.collect_platforms)            # Запрос 3: Платформы
+            developers = ex.submit(self.collect_developers)          # Запрос 4: Разработчики
+            stores = ex.submit(self.collect_stores)                  # Запрос 5: Магазины
+            games, genres, platforms, developers, stores = (
+                f.result() for f in (games, genres, platforms, developers, stores))
 
         #  вызов метода создания единого датасета
         unified_dataset_info = self.create_unified_dataset({
@@ -465,7 +749,7 @@ class RAWGDataCollector:
         print(f"- Разработчиков: {len(developers)}")
         print(f"- Магазинов: {len(stores)}")
         if unified_dataset_info:
-            print("- Единый датасет создан в формате csv")
+            print("- Единый датасет создан в формате parquet")
             for file in unified_dataset_info['file_paths']:
                 print(f"  • {os.path.basename(file)}")
         
@@ -486,8 +770,15 @@ def main():
         print("Ошибка: Не указан API ключ!")
         return
     
-    collector = RAWGDataCollector(API_KEY)
+    CACHE_ONLY = False  # True — только ответы из кеша, без сети (перезапуск обработки)
+    
+    METRICS.start_exporter(os.path.join("rawg_data", "metrics"))
+    collector = RAWGDataCollector(API_KEY, cache_only=CACHE_ONLY)
     results = collector.execute_all_requests()
+    # повторные обновления — только изменившиеся с прошлого раза игры:
+    # collector.sync_updated_games()
+    # разработчики и издатели для собранных игр:
+    # collector.enrich_games()
     
     # Вывод краткой статистики
     print("\nКРАТКАЯ СТАТИСТИКА ПО СОБРАННЫМ ДАННЫМ:")
@@ -497,15 +788,19 @@ def main():
     print(f" Разработчиков: {len(results['developers'])}")
     print(f" Магазинов: {len(results['stores'])}")
     
-    if results['games']:
-        ratings = [game['rating'] for game in results['games'] if game.get('rating', 0) > 0 and game.get('rating') != 'N/A']
-        if ratings:
-            print(f"- Средний рейтинг собранных игр: {sum(ratings)/len(ratings):.2f}")
-        
-        playtimes = [game['playtime'] for game in results['games'] if game.get('playtime', 0) > 0 and game.get('playtime') != 'N/A']
-        if playtimes:
-            print(f"- Среднее время игры: {sum(playtimes)/len(playtimes):.1f} часов")
+    games = results['games']
+    if len(games):
+        ratings = games['rating'][games['rating'] > 0]
+        if len(ratings):
+            print(f"- Средний рейтинг собранных игр: {ratings.mean():.2f}")
+        
+        playtimes = games['playtime'][games['playtime'] > 0]
+        if len(playtimes):
+            print(f"- Среднее время игры: {playtimes.mean():.1f} часов")
             
+    if collector.cache:
+        print(f" Кеш ответов: {collector.cache.stats()}")
+    
     if results.get('unified_dataset'):
         print(f"\n Единый датасет готов ")
         print("Файлы находятся в директории:", collector.data_dir)
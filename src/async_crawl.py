@@ -0,0 +1,53 @@
+import asyncio
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from rate_limit import TokenBucket
+
+
+class AsyncCrawler:
+    """asyncio-движок обхода: общий token bucket, лимит параллельности на хост,
+    без барьеров между пачками — новые задачи стартуют по мере завершения старых"""
+
+    def __init__(self, fetch, rate=4.0, burst=None, per_host=8, concurrency=32, retry=None):
+        self.fetch = fetch              # синхронная функция url -> результат (выполняется в потоке)
+        self.bucket = TokenBucket(rate, burst)
+        self.per_host = per_host
+        self.concurrency = concurrency
+        self.retry = retry              # RetryQueue: повтор после задержки, не занимая поток
+
+    async def _run_one(self, url, host_limits, executor):
+        host = urlsplit(url).netloc
+        loop = asyncio.get_running_loop()
+        while True:
+            async with host_limits[host]:
+                await self.bucket.acquire_async()
+                try:
+                    result = await loop.run_in_executor(executor, self.fetch, url)
+                except Exception as e:
+                    return url, e
+            # is not None: у RetryQueue есть __len__ (размер кучи повторов), а в этом режиме куча пуста
+            delay = self.retry.next_delay(result) if self.retry is not None else None
+            if delay is None:
+                return url, result
+            await asyncio.sleep(delay)
+
+    async def crawl(self, urls, on_result):
+        """Обходит urls, вызывая on_result(url, результат_или_исключение) по мере готовности"""
+        host_limits = defaultdict(lambda: asyncio.Semaphore(self.per_host))
+        running = set()
+        with ThreadPoolExecutor(self.concurrency) as executor:
+            # скользящее окно: в полете не больше concurrency задач
+            for url in urls:
+                running.add(asyncio.ensure_future(self._run_one(url, host_limits, executor)))
+                if len(running) >= self.concurrency:
+                    done, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        on_result(*task.result())
+            while running:
+                done, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    on_result(*task.result())
+
+    def run(self, urls, on_result):
+        asyncio.run(self.crawl(urls, on_result))
@@ -0,0 +1,71 @@
+import os
+import json
+
+
+class PageCheckpoint:
+    """Append-only JSONL-чекпоинт обработанных страниц и маленький файл-курсор.
+    Курсор хранит последнюю завершенную страницу и длину файла на этот момент,
+    поэтому строка, недописанная при падении, при возобновлении отбрасывается"""
+
+    def __init__(self, path, run_key=None):
+        self.path = path
+        self.cursor_path = path + ".cursor.json"
+        self.run_key = run_key          # параметры запуска; при их смене чекпоинт начинается заново
+        self.last_page = 0
+        self.offset = 0
+        self.started = None             # время начала запуска (ISO); сохраняется при возобновлении
+
+    def _read_cursor(self):
+        if not os.path.exists(self.cursor_path):
+            return None
+        with open(self.cursor_path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def _write_cursor(self, finished=False):
+        tmp = self.cursor_path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'run_key': self.run_key, 'last_page': self.last_page,
+                       'offset': self.offset, 'started': self.started, 'finished': finished}, f)
+        os.replace(tmp, self.cursor_path)
+
+    def reset(self):
+        for path in (self.path, self.cursor_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self.last_page = 0
+        self.offset = 0
+
+    def load(self):
+        """Возвращает (последняя завершенная страница, записи всех завершенных страниц)"""
+        cursor = self._read_cursor()
+        if not cursor or cursor.get('finished') or cursor.get('run_key') != self.run_key:
+            self.reset()
+            return 0, []
+        # JSONL удален или короче курсора (truncate дописал бы нули) — записей нет, начинаем заново
+        if not os.path.exists(self.path) or os.path.getsize(self.path) < cursor['offset']:
+            self.reset()
+            return 0, []
+        self.last_page = cursor['last_page']
+        self.offset = cursor['offset']
+        self.started = cursor.get('started')
+        records = []
+        with open(self.path, 'r+b') as f:
+            f.truncate(self.offset)
+            for line in f:
+                records.extend(json.loads(line)['records'])
+        return self.last_page, records
+
+    def append(self, page, records):
+        """Дописывает страницу одной строкой и сдвигает курсор"""
+        line = json.dumps({'page': page, 'records': records}, ensure_ascii=False) + "\n"
+        with open(self.path, 'ab') as f:
+            f.write(line.encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+            self.offset = f.tell()
+        self.last_page = page
+        self._write_cursor()
+
+    def finish(self):
+        """Сбор завершен: следующий запуск начнет с нуля"""
+        self._write_cursor(finished=True)
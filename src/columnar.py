@@ -0,0 +1,141 @@
+import re
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from steam_fields import parse_app_id, parse_price, parse_release_date
+
+# типы колонок Steam: цена — число и валюта, дата — настоящая дата; исходный текст сохраняется
+STEAM_SCHEMA = pa.schema([
+    ("title", pa.string()),
+    ("release", pa.date32()),
+    ("release_text", pa.string()),
+    ("price_amount", pa.float64()),
+    ("price_currency", pa.dictionary(pa.int8(), pa.string())),
+    ("is_free", pa.bool_()),
+    ("price_text", pa.string()),
+    ("url", pa.string()),
+    ("app_id", pa.int64()),
+    ("error", pa.string()),
+])
+
+# все колонки RAWG (игры и справочники); схема файла — подмножество по его колонкам
+RAWG_FIELDS = {
+    "id": pa.int64(),
+    "name": pa.string(),
+    "slug": pa.string(),
+    "games_count": pa.int64(),
+    "image_background": pa.string(),
+    "released": pa.date32(),
+    "tba": pa.bool_(),
+    "rating": pa.float64(),
+    "rating_top": pa.int16(),
+    "ratings_count": pa.int64(),
+    "metacritic": pa.int16(),
+    "playtime": pa.int32(),
+    "platforms_count": pa.int32(),
+    "genres": pa.list_(pa.string()),
+    "stores": pa.list_(pa.string()),
+    "tags": pa.list_(pa.string()),
+    "esrb_rating": pa.dictionary(pa.int8(), pa.string()),
+    "background_image": pa.string(),
+    "added": pa.int64(),
+    "suggestions_count": pa.int64(),
+    "updated": pa.timestamp("s"),
+    "domain": pa.string(),
+}
+LIST_SEP = re.compile(r",\s*")
+
+
+def _clean(series):
+    """Пропуски в старых файлах: 'N/A', пустые строки, NaN -> None"""
+    return series.astype(object).where(series.notna() & ~series.isin(["N/A", ""]), None)
+
+
+def _split(value):
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return [v for v in LIST_SEP.split(str(value)) if v]
+
+
+def _array(series, typ):
+    values = _clean(series)
+    if pa.types.is_list(typ):
+        return pa.array([_split(v) for v in values], type=typ)
+    if pa.types.is_dictionary(typ):
+        return pa.array(values.tolist(), type=typ.value_type).dictionary_encode().cast(typ)
+    if pa.types.is_date(typ):
+        return pa.array(pd.to_datetime(values, errors="coerce").dt.date.tolist(), type=typ, from_pandas=True)
+    if pa.types.is_timestamp(typ):
+        return pa.array(pd.to_datetime(values, errors="coerce", format="mixed").dt.floor("s"), type=typ, from_pandas=True)
+    if pa.types.is_boolean(typ):
+        return pa.array([None if v is None else str(v).lower() in ("true", "1") for v in values], type=typ)
+    if pa.types.is_integer(typ):
+        return pa.array(pd.to_numeric(values, errors="coerce").astype("Int64"), type=pa.int64()).cast(typ)
+    if pa.types.is_floating(typ):
+        return pa.array(pd.to_numeric(values, errors="coerce").astype("Float64"), type=typ)
+    return pa.array([None if v is None else str(v) for v in values], type=typ)
+
+
+def rawg_schema(columns):
+    return pa.schema([(c, RAWG_FIELDS.get(c, pa.string())) for c in columns])
+
+
+def rawg_table(df):
+    """DataFrame игр/справочников RAWG (в том числе прочитанный из CSV) -> таблица с RAWG_FIELDS"""
+    schema = rawg_schema(df.columns)
+    return pa.Table.from_arrays([_array(df[f.name], f.type) for f in schema], schema=schema)
+
+
+def steam_table(df):
+    """title/release/price/url/error -> таблица STEAM_SCHEMA: цена разбирается на сумму
+    и валюту, дата релиза — в date; колонки error может не быть (старые части)"""
+    n = len(df)
+    column = lambda name: _clean(df[name]) if name in df.columns else pd.Series([None] * n, dtype=object)
+    prices = [parse_price(p) for p in column("price")]
+    releases = column("release")
+    urls = column("url")
+    data = {
+        "title": column("title").tolist(),
+        "release": [parse_release_date(r) for r in releases],
+        "release_text": releases.tolist(),
+        "price_amount": [p[0] for p in prices],
+        "price_currency": [p[1] for p in prices],
+        "is_free": [p[2] for p in prices],
+        "price_text": column("price").tolist(),
+        "url": urls.tolist(),
+        "app_id": [parse_app_id(u) for u in urls],
+        "error": column("error").tolist(),
+    }
+    arrays = []
+    for field in STEAM_SCHEMA:
+        if pa.types.is_dictionary(field.type):
+            arrays.append(pa.array(data[field.name], type=field.type.value_type).dictionary_encode().cast(field.type))
+        else:
+            arrays.append(pa.array(data[field.name], type=field.type))
+    return pa.Table.from_arrays(arrays, schema=STEAM_SCHEMA)
+
+
+def write_parquet(table, path, row_group_size=50_000):
+    """Parquet со статистикой по группам строк — по ней read_parquet пропускает лишние группы"""
+    pq.write_table(table, path, compression="zstd", row_group_size=row_group_size)
+    return path
+
+
+def read_parquet(path, columns=None, filters=None):
+    """Чтение с проекцией и фильтрами, которые применяются при чтении файла:
+    read_parquet("steam.parquet", ["title", "price_amount"], [("price_amount", "<", 500)])"""
+    return pq.read_table(path, columns=columns, filters=filters).to_pandas(date_as_object=False)
+
+
+def save_frame(df, path_base, kind="rawg", export_csv=False):
+    """Пишет {path_base}.parquet с явной схемой; export_csv — еще и CSV как раньше (utf-8-sig)"""
+    table = steam_table(df) if kind == "steam" else rawg_table(df)
+    paths = [write_parquet(table, f"{path_base}.parquet")]
+    if export_csv:
+        df.to_csv(f"{path_base}.csv", index=False, encoding="utf-8-sig")
+        paths.append(f"{path_base}.csv")
+    return paths
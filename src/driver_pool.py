@@ -0,0 +1,97 @@
+import queue
+import threading
+import atexit
+from contextlib import contextmanager
+from selenium.common.exceptions import WebDriverException
+from metrics import METRICS
+
+
+class DriverPool:
+    """Ограниченный пул долгоживущих headless Chrome для потоков-воркеров"""
+
+    def __init__(self, factory, size, max_pages=200):
+        self.factory = factory          # функция, создающая новый драйвер
+        self.size = size                # не больше size браузеров одновременно
+        self.max_pages = max_pages      # после стольких страниц драйвер пересоздается
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = queue.LifoQueue()
+        self._pages = {}
+        self._lock = threading.Lock()
+        atexit.register(self.shutdown)
+
+    def _create(self):
+        with METRICS.timer("driver_launch"):
+            driver = self.factory()
+        with self._lock:
+            self._pages[driver] = 0
+        return driver
+
+    def _destroy(self, driver):
+        with self._lock:
+            self._pages.pop(driver, None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def is_alive(self, driver):
+        """Проверка, что браузер отвечает"""
+        try:
+            driver.current_url
+            return True
+        except (WebDriverException, OSError):
+            return False
+
+    def acquire(self):
+        """Выдает живой драйвер (свободный из пула или новый)"""
+        self._slots.acquire()
+        try:
+            while True:
+                try:
+                    driver = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._create()
+                if self.is_alive(driver):
+                    return driver
+                self._destroy(driver)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, driver, broken=False):
+        """Возвращает драйвер в пул или пересоздает его после N страниц/падения"""
+        try:
+            with self._lock:
+                pages = self._pages.get(driver, 0) + 1
+                self._pages[driver] = pages
+            if broken or pages >= self.max_pages:
+                self._destroy(driver)
+            else:
+                self._idle.put(driver)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def driver(self):
+        """with pool.driver() as d: ... — драйвер возвращается в пул автоматически"""
+        driver = self.acquire()
+        broken = False
+        try:
+            yield driver
+        except Exception:
+            broken = not self.is_alive(driver)
+            raise
+        finally:
+            self.release(driver, broken)
+
+    def shutdown(self):
+        """Закрывает все браузеры пула (пул можно использовать снова)"""
+        with self._lock:
+            drivers = list(self._pages)
+        for driver in drivers:
+            self._destroy(driver)
+        while True:
+            try:
+                self._idle.get_nowait()
+            except queue.Empty:
+                break
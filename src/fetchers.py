@@ -0,0 +1,179 @@
+import re
+import time
+import random
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from lxml import html
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from metrics import METRICS
+
+# XPath-аналоги CSS-селекторов, которые использует Selenium-парсер
+def _css_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+TITLE_XPATH = f"//*[{_css_class('apphub_AppName')}]"
+DATE_XPATH = f"//*[{_css_class('date')}]"
+PRICE_XPATH = f"//*[{_css_class('game_purchase_price')} or {_css_class('discount_final_price')}]"
+SEARCH_ROW_XPATH = f"//a[{_css_class('search_result_row')}]/@href"
+
+# cookies, с которыми Steam не показывает возрастную проверку и отдает русскую локаль
+STEAM_COOKIES = {
+    "birthtime": "283993201",
+    "lastagecheckage": "1-0-1979",
+    "wants_mature_content": "1",
+    "mature_content": "1",
+    "Steam_Language": "russian",
+}
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36",
+    "Accept-Language": "ru-RU,ru;q=0.9",
+}
+
+
+class FetchError(Exception):
+    """Страницу не удалось разобрать этим бэкендом"""
+
+
+class AgeGateError(FetchError):
+    """Steam перенаправил на страницу возрастной проверки"""
+
+
+def classify_error(error):
+    """Класс ошибки для очереди повторов и итогового отчета"""
+    if isinstance(error, AgeGateError):
+        return "age_gate"
+    if isinstance(error, (requests.Timeout, TimeoutException)):
+        return "timeout"
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        if error.response.status_code in (429, 503):
+            return "rate_limited"
+        return "http_error"
+    if isinstance(error, (FetchError, NoSuchElementException)):
+        return "missing_element"
+    return "other"
+
+
+def _text(nodes):
+    """Текст первого найденного элемента (как .text у Selenium)"""
+    if not nodes:
+        return None
+    return re.sub(r"\s+", " ", nodes[0].text_content()).strip()
+
+
+def extract_game_meta(page, link):
+    """Запись игры и признак скидки (цена взята из .discount_final_price)"""
+    if isinstance(page, bytes):
+        page = page.decode("utf-8", errors="replace")
+    tree = html.fromstring(page)
+    title = _text(tree.xpath(TITLE_XPATH))
+    release = _text(tree.xpath(DATE_XPATH))
+    if not title:
+        raise FetchError("не найден элемент .apphub_AppName")
+    if release is None:
+        raise FetchError("не найден элемент .date")
+    price_el = tree.xpath(PRICE_XPATH)
+    price = _text(price_el) or "N/A"
+    discounted = bool(price_el) and "discount_final_price" in (price_el[0].get("class") or "")
+    return {"title": title, "release": release, "price": price, "url": link}, discounted
+
+
+def extract_game(page, link):
+    """Разбор серверного HTML страницы игры в ту же запись, что и у Selenium"""
+    return extract_game_meta(page, link)[0]
+
+
+def extract_links(page):
+    """Ссылки на игры со страницы поиска (без параметров после ?)"""
+    if isinstance(page, bytes):
+        page = page.decode("utf-8", errors="replace")
+    tree = html.fromstring(page)
+    return list({href.split("?")[0] for href in tree.xpath(SEARCH_ROW_XPATH) if href})
+
+
+class HttpFetcher:
+    """Быстрый бэкенд: requests.Session (по одной на поток) + lxml"""
+
+    def __init__(self, timeout=15, pool_size=20, delay=(0.2, 0.6)):
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.delay = delay
+        self._local = threading.local()
+
+    @property
+    def session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update(HEADERS)
+            session.cookies.update(STEAM_COOKIES)
+            self._local.session = session
+        return session
+
+    def get(self, url, headers=None):
+        if self.delay:
+            with METRICS.timer("sleep"):
+                time.sleep(random.uniform(*self.delay))
+        with METRICS.timer("page_load", backend="http"):
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+        METRICS.inc("http_responses_total", status=response.status_code)
+        return response
+
+    def fetch(self, link):
+        response = self.get(link)
+        response.raise_for_status()
+        if "/agecheck/" in response.url:
+            raise AgeGateError(f"возрастная проверка: {response.url}")
+        with METRICS.timer("extract", backend="http"):
+            return extract_game(response.content, link)
+
+    def fetch_conditional(self, link, etag=None, last_modified=None):
+        """Условный запрос: (None, валидаторы, False) при 304, иначе (запись, валидаторы, скидка)"""
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        response = self.get(link, headers)
+        validators = {"etag": response.headers.get("ETag") or etag,
+                      "last_modified": response.headers.get("Last-Modified") or last_modified}
+        if response.status_code == 304:
+            return None, validators, False
+        response.raise_for_status()
+        if "/agecheck/" in response.url:
+            raise AgeGateError(f"возрастная проверка: {response.url}")
+        with METRICS.timer("extract", backend="http"):
+            record, discounted = extract_game_meta(response.content, link)
+        return record, validators, discounted
+
+    def fetch_links(self, url):
+        response = self.get(url)
+        response.raise_for_status()
+        return extract_links(response.content)
+
+
+class SeleniumFetcher:
+    """Медленный бэкенд через браузер из DriverPool (запасной вариант)"""
+
+    def __init__(self, pool, delay=(1.5, 3)):
+        self.pool = pool
+        self.delay = delay
+
+    def fetch(self, link):
+        with self.pool.driver() as driver:
+            with METRICS.timer("page_load", backend="selenium"):
+                driver.get(link)
+            with METRICS.timer("sleep"):
+                time.sleep(random.uniform(*self.delay))
+            if "/agecheck/" in driver.current_url:
+                raise AgeGateError(f"возрастная проверка: {driver.current_url}")
+            with METRICS.timer("extract", backend="selenium"):
+                title = driver.find_element(By.CSS_SELECTOR, ".apphub_AppName").text
+                release = driver.find_element(By.CSS_SELECTOR, ".date").text
+                price_el = driver.find_elements(By.CSS_SELECTOR, ".game_purchase_price, .discount_final_price")
+                price = price_el[0].text if price_el else "N/A"
+            return {"title": title, "release": release, "price": price, "url": link}
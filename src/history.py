@@ -0,0 +1,283 @@
+import os
+import re
+import sqlite3
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from columnar import read_parquet
+from steam_fields import parse_app_id, parse_price
+
+#CONFIG
+RAWG_DIR = "rawg_data"                      # __main__: снимки games_5k_* / games_sync_*
+# одна база на все источники, рядом с выгрузками RAWG (api1.py и merge.py запускаются из src)
+HISTORY_DB = os.path.join(RAWG_DIR, "history.sqlite")
+STEAM_DATASET = "steam_final_dataset"       # __main__: результат merge.py (.parquet)
+RAWG_METRICS = ["ratings_count", "added", "rating"]
+PRECISION = 6             # дробные метрики сравниваются и восстанавливаются с этой точностью
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,                 -- rawg / steam
+    taken_at TEXT NOT NULL,               -- момент сбора, ISO
+    rows INTEGER,
+    UNIQUE (source, taken_at)
+);
+CREATE TABLE IF NOT EXISTS series (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    key INTEGER NOT NULL,                 -- id игры RAWG или app id Steam
+    metric TEXT NOT NULL,
+    name TEXT,
+    UNIQUE (source, key, metric)
+);
+-- только изменения: delta — разница с предыдущим значением ряда (первое — от нуля),
+-- повторный снимок без изменений не добавляет ни одной строки
+CREATE TABLE IF NOT EXISTS observations (
+    series_id INTEGER NOT NULL REFERENCES series(id),
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots(id),
+    delta REAL NOT NULL,
+    PRIMARY KEY (snapshot_id, series_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_observations_series ON observations(series_id, snapshot_id);
+-- последнее значение ряда: для сравнения со следующим снимком без чтения истории
+CREATE TABLE IF NOT EXISTS latest (series_id INTEGER PRIMARY KEY, value REAL NOT NULL, snapshot_id INTEGER NOT NULL);
+
+-- состояние расчета скорости: значение на конец текущей недели и предыдущей недели со снимком
+CREATE TABLE IF NOT EXISTS trend (
+    series_id INTEGER PRIMARY KEY,
+    week TEXT NOT NULL, value REAL NOT NULL, velocity REAL,
+    base_week TEXT, base_value REAL, base_velocity REAL
+);
+-- недели с ненулевой скоростью или ускорением; нет строки — значение за неделю не менялось
+CREATE TABLE IF NOT EXISTS weekly (
+    series_id INTEGER NOT NULL,
+    week TEXT NOT NULL,                   -- понедельник недели
+    value REAL NOT NULL,
+    velocity REAL NOT NULL,               -- прирост за неделю
+    acceleration REAL,                    -- изменение скорости за неделю
+    PRIMARY KEY (series_id, week)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_weekly_week ON weekly(week);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value);
+"""
+
+STAMP_RE = re.compile(r"(\d{8}_\d{6})")
+
+
+def snapshot_time(path):
+    """Время снимка по имени файла (games_5k_20251111_171210.csv), иначе по mtime"""
+    m = STAMP_RE.search(os.path.basename(path))
+    if m:
+        return datetime.strptime(m.group(1), "%Y%m%d_%H%M%S")
+    return datetime.fromtimestamp(os.path.getmtime(path))
+
+
+def week_start(moment):
+    day = moment.date() if isinstance(moment, datetime) else moment
+    return (day - timedelta(days=day.weekday())).isoformat()
+
+
+def _weeks_between(earlier, later):
+    return (datetime.fromisoformat(later) - datetime.fromisoformat(earlier)).days // 7
+
+
+class HistoryStore:
+    """Временные ряды метрик игр по снимкам (запускам сбора) в SQLite.
+    Хранятся только изменения значений; недельные скорость и ускорение
+    досчитываются по новым снимкам, без повторного чтения всей истории"""
+
+    def __init__(self, path=HISTORY_DB):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _meta(self, key, default=0):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def record(self, source, rows, taken_at):
+        """rows — (key, name, {metric: value}); возвращает число записанных изменений
+        или None, если снимок с этим временем уже записан или старше последнего"""
+        taken_at = taken_at.isoformat(timespec="seconds")
+        with self.conn:
+            newest = self.conn.execute("SELECT MAX(taken_at) FROM snapshots WHERE source = ?", (source,)).fetchone()[0]
+            if newest is not None and taken_at < newest:
+                # изменения считаются от предыдущего снимка, поэтому история только дописывается
+                print(f"Снимок {source} от {taken_at} старше последнего ({newest}) — пропущен")
+                return None
+            try:
+                snapshot = self.conn.execute("INSERT INTO snapshots (source, taken_at) VALUES (?, ?)",
+                                             (source, taken_at)).lastrowid
+            except sqlite3.IntegrityError:
+                return None
+            ids = {(k, m): i for i, k, m in self.conn.execute(
+                "SELECT id, key, metric FROM series WHERE source = ?", (source,))}
+            last = dict(self.conn.execute(
+                "SELECT l.series_id, l.value FROM latest l JOIN series s ON s.id = l.series_id WHERE s.source = ?",
+                (source,)))
+            changes, seen = [], 0
+            for key, name, values in rows:
+                seen += 1
+                for metric, value in values.items():
+                    if value is None or pd.isna(value):
+                        continue
+                    value = round(float(value), PRECISION)
+                    series_id = ids.get((key, metric))
+                    if series_id is None:
+                        series_id = self.conn.execute(
+                            "INSERT INTO series (source, key, metric, name) VALUES (?, ?, ?, ?)",
+                            (source, key, metric, name)).lastrowid
+                        ids[(key, metric)] = series_id
+                    previous = last.get(series_id)
+                    if previous is not None and previous == value:
+                        continue
+                    changes.append((series_id, value, round(value - (previous or 0.0), PRECISION)))
+                    last[series_id] = value
+            self.conn.executemany("INSERT INTO observations (series_id, snapshot_id, delta) VALUES (?, ?, ?)",
+                                  [(s, snapshot, d) for s, _, d in changes])
+            self.conn.executemany("INSERT OR REPLACE INTO latest (series_id, value, snapshot_id) VALUES (?, ?, ?)",
+                                  [(s, v, snapshot) for s, v, _ in changes])
+            self.conn.execute("UPDATE snapshots SET rows = ? WHERE id = ?", (seen, snapshot))
+        return len(changes)
+
+    def record_games(self, df, taken_at):
+        """Снимок таблицы игр RAWG (games_frame / unified_games)"""
+        df = df.drop_duplicates("id")
+        metrics = [m for m in RAWG_METRICS if m in df.columns]
+        rows = ((int(game_id), name, dict(zip(metrics, values)))
+                for game_id, name, *values in zip(df["id"], df["name"], *(df[m] for m in metrics)))
+        return self.record("rawg", rows, taken_at)
+
+    def record_steam(self, df, taken_at):
+        """Снимок страниц Steam: price_amount из Parquet или цена из текста колонки price
+        (сумма без учета валюты, бесплатные — 0), ключ — app id; строки с ошибкой пропускаются"""
+        if "error" in df.columns:
+            df = df[df["error"].isna() | (df["error"] == "")]
+        if "price_amount" in df.columns:
+            prices = df["price_amount"].tolist()
+        else:
+            prices = [parse_price(p)[0] for p in df["price"]]
+        rows = {}
+        for title, price, url in zip(df["title"], prices, df["url"]):
+            app_id = parse_app_id(url)
+            if app_id is not None:
+                rows[app_id] = (app_id, title, {"price": price})
+        return self.record("steam", rows.values(), taken_at)
+
+    def update_velocity(self):
+        """Досчитывает недельные скорость и ускорение по снимкам, записанным после
+        прошлого запуска. Читаются только изменения новых снимков и состояние trend
+        (по строке на ряд); снимки одной недели схлопываются в значение на ее конец"""
+        done = self._meta("velocity_snapshot")
+        snapshots = self.conn.execute("SELECT id, source, taken_at FROM snapshots WHERE id > ? ORDER BY taken_at, id",
+                                      (done,)).fetchall()
+        if not snapshots:
+            return 0
+        weeks = {}
+        for snapshot_id, source, taken_at in snapshots:
+            ids, sources = weeks.setdefault(week_start(datetime.fromisoformat(taken_at)), ([], set()))
+            ids.append(snapshot_id)
+            sources.add(source)
+        source_of = dict(self.conn.execute("SELECT id, source FROM series"))
+        state = {row[0]: list(row[1:]) for row in self.conn.execute(
+            "SELECT series_id, week, value, velocity, base_week, base_value, base_velocity FROM trend")}
+        written = 0
+        with self.conn:
+            for week in sorted(weeks):
+                ids, sources = weeks[week]
+                changes = dict(self.conn.execute(
+                    f"SELECT series_id, SUM(delta) FROM observations WHERE snapshot_id IN ({','.join('?' * len(ids))}) "
+                    "GROUP BY series_id", ids))
+                out = []
+                # ряды источника, у которого на этой неделе был снимок: без изменений — скорость 0
+                for series_id in set(changes) | {k for k in state if source_of.get(k) in sources}:
+                    s = state.get(series_id)
+                    delta = changes.get(series_id, 0.0)
+                    if s is None:
+                        # первое наблюдение ряда — точка отсчета, скорости еще нет
+                        state[series_id] = [week, round(delta, PRECISION), None, None, None, None]
+                        continue
+                    if week < s[0]:
+                        continue                      # снимок задним числом: неделя уже посчитана
+                    if week > s[0]:
+                        s[3], s[4], s[5] = s[0], s[1], s[2]   # текущая неделя становится базовой
+                        s[0] = week
+                    s[1] = round(s[1] + delta, PRECISION)
+                    if s[3] is None:
+                        continue
+                    weeks_passed = max(_weeks_between(s[3], s[0]), 1)
+                    s[2] = round((s[1] - s[4]) / weeks_passed, PRECISION)
+                    acceleration = None if s[5] is None else round((s[2] - s[5]) / weeks_passed, PRECISION)
+                    if s[2] or acceleration:
+                        out.append((series_id, week, s[1], s[2], acceleration))
+                self.conn.executemany("INSERT OR REPLACE INTO weekly (series_id, week, value, velocity, acceleration) "
+                                      "VALUES (?, ?, ?, ?, ?)", out)
+                written += len(out)
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO trend (series_id, week, value, velocity, base_week, base_value, base_velocity) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", [(k, *v) for k, v in state.items()])
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('velocity_snapshot', ?)",
+                              (max(row[0] for row in snapshots),))
+        return written
+
+    def trending(self, metric="added", source="rawg", week=None, limit=20):
+        """Ряды с наибольшей скоростью за неделю (по умолчанию — последнюю посчитанную)"""
+        if week is None:
+            week = self.conn.execute("SELECT MAX(week) FROM weekly").fetchone()[0]
+        return pd.read_sql_query("""
+            SELECT s.key, s.name, w.week, w.value, w.velocity, w.acceleration
+            FROM weekly w JOIN series s ON s.id = w.series_id
+            WHERE w.week = ? AND s.metric = ? AND s.source = ?
+            ORDER BY w.velocity DESC LIMIT ?""", self.conn, params=(week, metric, source, limit))
+
+    def history(self, key, metric, source="rawg"):
+        """Значения ряда по снимкам: накопленная сумма изменений"""
+        df = pd.read_sql_query("""
+            SELECT sn.taken_at, o.delta FROM observations o
+            JOIN series s ON s.id = o.series_id JOIN snapshots sn ON sn.id = o.snapshot_id
+            WHERE s.source = ? AND s.key = ? AND s.metric = ? ORDER BY sn.taken_at, sn.id""",
+            self.conn, params=(source, key, metric))
+        df["value"] = df.pop("delta").cumsum().round(PRECISION)
+        return df
+
+
+def read_steam_snapshot(path_base=STEAM_DATASET):
+    """Нужные истории колонки объединенного датасета Steam из Parquet (CSV не требуется)"""
+    return read_parquet(f"{path_base}.parquet", columns=["title", "price_amount", "url", "error"])
+
+
+def record_snapshot(df, taken_at, path=HISTORY_DB, source="rawg"):
+    """Записывает снимок и сразу досчитывает недельную скорость"""
+    store = HistoryStore(path)
+    try:
+        changes = store.record_games(df, taken_at) if source == "rawg" else store.record_steam(df, taken_at)
+        if changes is not None:
+            store.update_velocity()
+            print(f"История {path}: изменений в снимке {changes}")
+        return changes
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    import glob
+    from rawg_transform import read_games_csv
+
+    store = HistoryStore()
+    files = glob.glob(os.path.join(RAWG_DIR, "games_5k_*.csv")) + glob.glob(os.path.join(RAWG_DIR, "games_sync_*.csv"))
+    for path in sorted(files, key=snapshot_time):
+        changes = store.record_games(read_games_csv(path), snapshot_time(path))
+        print(f"{path}: {'уже записан' if changes is None else f'{changes} изменений'}")
+    if os.path.exists(f"{STEAM_DATASET}.parquet"):
+        changes = store.record_steam(read_steam_snapshot(), snapshot_time(f"{STEAM_DATASET}.parquet"))
+        print(f"{STEAM_DATASET}.parquet: {'уже записан' if changes is None else f'{changes} изменений'}")
+    print(f"Недельных точек добавлено: {store.update_velocity()}")
+    print(store.trending().to_string(index=False))
+    store.close()
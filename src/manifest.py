@@ -0,0 +1,71 @@
+import os
+import time
+import hashlib
+import sqlite3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS parts (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    sha1 TEXT NOT NULL,
+    rows INTEGER NOT NULL,
+    merged_at REAL NOT NULL
+);
+"""
+
+
+def file_hash(path, block=1 << 20):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(block), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class PartManifest:
+    """Список уже объединенных частей: путь, размер, mtime и хеш содержимого.
+    Хеш пересчитывается, только если изменились размер или mtime"""
+
+    def __init__(self, conn):
+        self.conn = conn if isinstance(conn, sqlite3.Connection) else sqlite3.connect(conn)
+        self.conn.executescript(SCHEMA)
+
+    def scan(self, files):
+        """Возвращает (новые или измененные части в порядке files, удаленные части, сведения о частях)"""
+        known = {row[0]: row[1:] for row in self.conn.execute("SELECT path, size, mtime, sha1 FROM parts")}
+        todo, info = [], {}
+        for path in files:
+            st = os.stat(path)
+            old = known.get(path)
+            if old and old[0] == st.st_size and old[1] == st.st_mtime:
+                continue
+            sha1 = file_hash(path)
+            info[path] = (st.st_size, st.st_mtime, sha1)
+            if old and old[2] == sha1:
+                # файл только "потрогали" — запоминаем новый mtime, объединять заново не нужно
+                with self.conn:
+                    self.conn.execute("UPDATE parts SET mtime = ? WHERE path = ?", (st.st_mtime, path))
+                continue
+            todo.append(path)
+        removed = sorted(set(known) - set(files))
+        return todo, removed, info
+
+    def record(self, path, info, rows):
+        size, mtime, sha1 = info
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO parts (path, size, mtime, sha1, rows, merged_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (path, size, mtime, sha1, rows, time.time()))
+
+    def forget(self, paths=None):
+        """Убирает части из манифеста (все, если paths не указан)"""
+        with self.conn:
+            if paths is None:
+                self.conn.execute("DELETE FROM parts")
+            else:
+                self.conn.executemany("DELETE FROM parts WHERE path = ?", [(p,) for p in paths])
+
+    def paths(self):
+        """Объединенные части в порядке объединения"""
+        return [row[0] for row in self.conn.execute("SELECT path FROM parts ORDER BY merged_at, rowid")]
@@ -1,26 +1,25 @@
-import pandas as pd
+import os
 import glob
+from datetime import datetime
+from history import HISTORY_DB, read_steam_snapshot, record_snapshot
+from stream_merge import merge_parts
+
+EXPORT_CSV = True  # кроме steam_final_dataset.parquet еще и CSV, как раньше
+MERGE_INDEX = "steam_merge_index.sqlite"
 
 def merge_results():
     # Собираем все CSV из папки results
-    files = sorted(glob.glob("results/*.csv"))
+    # от старых к новым: из повторно скачанных ссылок останется последняя успешная строка
+    files = sorted(glob.glob("results/*.csv"), key=os.path.getmtime)
     print(f" Найдено {len(files)} файлов для объединения")
 
-    # Читаем и добавляем в список
-    all_data = []
-    for f in files:
-        try:
-            df = pd.read_csv(f)
-            all_data.append(df)
-            print(f" Добавлен {f} ({len(df)} строк)")
-        except Exception as e:
-            print(f" Ошибка при чтении {f}: {e}")
-
-    # Объединяем в один DataFrame
-    result = pd.concat(all_data, ignore_index=True)
+    # Потоковое объединение: части читаются кусками, дубли ссылок убираются через индекс на диске
+    merge_parts(files, "steam_final_dataset", MERGE_INDEX, export_csv=EXPORT_CSV)
 
-    result.to_csv("steam_final_dataset.csv", index=False, encoding="utf-8-sig")
-    print(f"\n Сохранено в steam_final_dataset.csv ({len(result)} строк)")
+    # снимок цен в историю из Parquet (пишется всегда, в отличие от CSV);
+    # цена, не изменившаяся с прошлого запуска, места не занимает
+    if files and os.path.isdir("steam_final_dataset.parquet"):
+        record_snapshot(read_steam_snapshot("steam_final_dataset"), datetime.now(), HISTORY_DB, source="steam")
 
 if __name__ == "__main__":
     merge_results()
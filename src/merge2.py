@@ -1,24 +1,63 @@
-import pandas as pd
+import os
 import glob
+import hashlib
+import pandas as pd
+from columnar import RAWG_FIELDS, rawg_table, write_parquet
+from manifest import PartManifest
+
+EXPORT_CSV = True  # кроме API_merged.parquet еще и CSV, как раньше
+MANIFEST_DB = "API_merged_manifest.sqlite"
+COLUMNS = list(RAWG_FIELDS)  # общий набор колонок для игр и справочников
+
+def fragment_path(out_dir, part):
+    # у каждой части свой фрагмент: измененная часть заменяет только его
+    return os.path.join(out_dir, hashlib.sha1(part.encode("utf-8")).hexdigest()[:16] + ".parquet")
+
+def read_part(path):
+    return pd.read_csv(path).reindex(columns=COLUMNS)
 
 def merge_api_results():
     # Ищем все CSV-файлы в папке API
     files = sorted(glob.glob("API/*.csv"))
     print(f" Найдено {len(files)} файлов для объединения")
 
-    all_data = []
-    for f in files:
+    out_dir, csv_path = "API_merged.parquet", "API_merged.csv"
+    if os.path.isfile(out_dir):
+        os.remove(out_dir)  # одиночный файл от прежней версии
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = PartManifest(MANIFEST_DB)
+    # по манифесту объединяются только новые и измененные части
+    todo, removed, info = manifest.scan(files)
+    rewrite_csv = bool(removed) or any(p in manifest.paths() for p in todo) or not os.path.exists(csv_path)
+
+    for part in removed:
+        if os.path.exists(fragment_path(out_dir, part)):
+            os.remove(fragment_path(out_dir, part))
+        print(f" Удален {part}")
+    manifest.forget(removed)
+
+    for f in todo:
         try:
-            df = pd.read_csv(f)
-            all_data.append(df)
+            df = read_part(f)
+            write_parquet(rawg_table(df), fragment_path(out_dir, f))
+            if EXPORT_CSV and not rewrite_csv:
+                df.to_csv(csv_path, mode="a", header=False, index=False, encoding="utf-8")
+            manifest.record(f, info[f], len(df))
             print(f" Добавлен {f} ({len(df)} строк)")
         except Exception as e:
             print(f" Ошибка при чтении {f}: {e}")
 
-    result = pd.concat(all_data, ignore_index=True)
+    if not todo and not removed:
+        print(" Новых или измененных файлов нет, результат актуален")
+    elif EXPORT_CSV and rewrite_csv:
+        # CSV нельзя поправить на месте: собираем заново по частям, по одной в памяти
+        with open(csv_path + ".tmp", "w", newline="", encoding="utf-8-sig") as out:
+            for i, f in enumerate(manifest.paths()):
+                read_part(f).to_csv(out, header=i == 0, index=False)
+        os.replace(csv_path + ".tmp", csv_path)
 
-    result.to_csv("API_merged.csv", index=False, encoding="utf-8-sig")
-    print(f"\n Сохранено в API_merged.csv ({len(result)} строк)")
+    total = sum(row[0] for row in manifest.conn.execute("SELECT rows FROM parts"))
+    print(f"\n Сохранено в {out_dir}{', ' + csv_path if EXPORT_CSV else ''} ({total} строк)")
 
 if __name__ == "__main__":
     merge_api_results()
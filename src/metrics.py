@@ -0,0 +1,166 @@
+import os
+import json
+import time
+import atexit
+import bisect
+import threading
+from contextlib import contextmanager
+
+# границы корзин гистограммы задержек, секунды
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Оценка квантиля по корзинам (верхняя граница корзины)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                return BUCKETS[i] if i < len(BUCKETS) else float("inf")
+        return float("inf")
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def _fmt_labels(labels, extra=None):
+    items = list(labels) + (list(extra.items()) if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+class Metrics:
+    """Легкие метрики обхода: счетчики, gauge и гистограммы задержек по этапам.
+    Одна блокировка и словари — можно оставлять включенными в рабочих запусках"""
+
+    def __init__(self, prefix="crawl"):
+        self.prefix = prefix
+        self.started = time.time()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._exporter = None
+
+    def inc(self, name, value=1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        with self._lock:
+            self._gauges[_key(name, labels)] = value
+
+    def observe(self, name, value, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram()
+            hist.observe(value)
+
+    @contextmanager
+    def timer(self, stage, **labels):
+        """with METRICS.timer("page_load"): ... — время этапа в гистограмму stage_seconds"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("stage_seconds", time.perf_counter() - started, stage=stage, **labels)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "uptime": round(time.time() - self.started, 1),
+                "counters": [{"name": n, "labels": dict(l), "value": v} for (n, l), v in self._counters.items()],
+                "gauges": [{"name": n, "labels": dict(l), "value": v} for (n, l), v in self._gauges.items()],
+                "histograms": [
+                    {"name": n, "labels": dict(l), "count": h.count, "sum": round(h.sum, 4),
+                     "p50": h.quantile(0.5), "p95": h.quantile(0.95)}
+                    for (n, l), h in self._histograms.items()],
+            }
+
+    def to_prometheus(self):
+        """Текст в формате Prometheus textfile collector"""
+        p = self.prefix
+        lines = []
+        with self._lock:
+            for name in sorted({n for n, _ in self._counters}):
+                lines.append(f"# TYPE {p}_{name} counter")
+                lines += [f"{p}_{n}{_fmt_labels(l)} {v}" for (n, l), v in self._counters.items() if n == name]
+            for name in sorted({n for n, _ in self._gauges}):
+                lines.append(f"# TYPE {p}_{name} gauge")
+                lines += [f"{p}_{n}{_fmt_labels(l)} {v}" for (n, l), v in self._gauges.items() if n == name]
+            for name in sorted({n for n, _ in self._histograms}):
+                lines.append(f"# TYPE {p}_{name} histogram")
+                for (n, l), h in self._histograms.items():
+                    if n != name:
+                        continue
+                    cumulative = 0
+                    for bound, c in zip(BUCKETS + ("+Inf",), h.counts):
+                        cumulative += c
+                        lines.append(f"{p}_{n}_bucket{_fmt_labels(l, {'le': bound})} {cumulative}")
+                    lines.append(f"{p}_{n}_sum{_fmt_labels(l)} {h.sum:.6f}")
+                    lines.append(f"{p}_{n}_count{_fmt_labels(l)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path_prefix):
+        """Пишет {path_prefix}.json и {path_prefix}.prom (атомарно, через временный файл)"""
+        for path, text in ((f"{path_prefix}.json", json.dumps(self.snapshot(), ensure_ascii=False, indent=2)),
+                           (f"{path_prefix}.prom", self.to_prometheus())):
+            tmp = path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp, path)
+
+    def start_exporter(self, path_prefix, interval=30):
+        """Периодическая выгрузка в фоне и сводка при завершении процесса"""
+        if self._exporter:
+            return
+        stop = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                self.export(path_prefix)
+
+        self._exporter = threading.Thread(target=run, daemon=True)
+        self._exporter.start()
+
+        def finish():
+            stop.set()
+            self.export(path_prefix)
+            self.print_summary()
+
+        atexit.register(finish)
+
+    def print_summary(self):
+        snap = self.snapshot()
+        print(f"\nМЕТРИКИ ЗА {snap['uptime']:.0f} с")
+        for h in sorted(snap["histograms"], key=lambda h: -h["sum"]):
+            labels = ", ".join(f"{k}={v}" for k, v in h["labels"].items())
+            avg = h["sum"] / h["count"] if h["count"] else 0
+            print(f"- {labels}: {h['count']} раз, всего {h['sum']:.1f} с, "
+                  f"в среднем {avg:.3f} с, p95 ≤ {h['p95']} с")
+        for c in snap["counters"]:
+            labels = ", ".join(f"{k}={v}" for k, v in c["labels"].items())
+            print(f"- {c['name']}{' (' + labels + ')' if labels else ''}: {c['value']}")
+
+
+# общий экземпляр для всех модулей процесса
+METRICS = Metrics()
@@ -0,0 +1,169 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from columnar import LIST_SEP
+
+#CONFIG
+GAMES_FILE = "../data/unmergeddata_from_api/unified_games_20251111_171210.csv"
+FIELDS = ("genres", "stores", "tags")
+
+
+def _split(value):
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [str(v) for v in value]
+    if not isinstance(value, str):
+        return []
+    return [v for v in LIST_SEP.split(value.strip()) if v]
+
+
+class LabelBits:
+    """Словарь меток одного поля и битовая матрица игр: строка — игра,
+    бит j — метка labels[j] (np.packbits, 1 бит на пару игра-метка)"""
+
+    def __init__(self, labels, bits):
+        self.labels = list(labels)
+        self.index = {label: i for i, label in enumerate(self.labels)}
+        self.bits = bits
+
+    @classmethod
+    def from_values(cls, values):
+        rows = [list(dict.fromkeys(_split(v))) for v in values]
+        labels = sorted({label for row in rows for label in row})
+        index = {label: i for i, label in enumerate(labels)}
+        dense = np.zeros((len(rows), max(len(labels), 1)), dtype=bool)
+        for r, row in enumerate(rows):
+            dense[r, [index[label] for label in row]] = True
+        return cls(labels, np.packbits(dense, axis=1))
+
+    def _query(self, labels):
+        mask = np.zeros(len(self.labels), dtype=bool)
+        for label in labels:
+            if label not in self.index:
+                raise KeyError(f"Неизвестная метка: {label}")
+            mask[self.index[label]] = True
+        return np.packbits(mask)
+
+    def any_of(self, *labels):
+        """Булев массив: у игры есть хотя бы одна из меток"""
+        return (self.bits & self._query(labels)).any(axis=1)
+
+    def all_of(self, *labels):
+        """Булев массив: у игры есть все метки"""
+        query = self._query(labels)
+        return ((self.bits & query) == query).all(axis=1)
+
+    def dense(self):
+        """Матрица bool (игры x метки) — для агрегаций"""
+        return np.unpackbits(self.bits, axis=1, count=len(self.labels)).astype(bool)
+
+    def counts(self):
+        return pd.Series(self.dense().sum(axis=0), index=self.labels).sort_values(ascending=False)
+
+    def aggregate(self, values, func="mean", mask=None):
+        """Агрегат values по каждой метке (игра учитывается во всех своих метках):
+        sum / mean / count; mask — дополнительный фильтр игр"""
+        matrix = self.dense()
+        values = np.asarray(values, dtype=float)
+        valid = ~np.isnan(values)
+        if mask is not None:
+            valid &= np.asarray(mask, dtype=bool)
+        matrix = matrix & valid[:, None]
+        counts = matrix.sum(axis=0)
+        sums = np.nan_to_num(values) @ matrix
+        if func == "count":
+            result = counts
+        elif func == "sum":
+            result = sums
+        elif func == "mean":
+            with np.errstate(invalid="ignore", divide="ignore"):
+                result = sums / counts
+        else:
+            raise ValueError(f"Неизвестная агрегация: {func}")
+        return pd.Series(result, index=self.labels)
+
+    def labels_of(self, row):
+        return [self.labels[i] for i in np.flatnonzero(np.unpackbits(self.bits[row], count=len(self.labels)))]
+
+
+class GameLabels:
+    """Многозначные поля игр (genres/stores/tags) в виде битовых матриц;
+    строки совпадают по порядку с датасетом, ids — id игр"""
+
+    def __init__(self, ids, fields):
+        self.ids = np.asarray(ids)
+        self.fields = fields
+
+    @classmethod
+    def from_frame(cls, df, fields=FIELDS):
+        return cls(df["id"].to_numpy(), {f: LabelBits.from_values(df[f]) for f in fields if f in df.columns})
+
+    def __getitem__(self, field):
+        return self.fields[field]
+
+    def filter(self, any_of=None, all_of=None):
+        """Маска игр: any_of/all_of — {поле: [метки]}, условия объединяются через И.
+        filter(any_of={"stores": ["GOG", "Epic Games"]}, all_of={"genres": ["Shooter"]})"""
+        mask = np.ones(len(self.ids), dtype=bool)
+        for field, labels in (any_of or {}).items():
+            mask &= self.fields[field].any_of(*labels)
+        for field, labels in (all_of or {}).items():
+            mask &= self.fields[field].all_of(*labels)
+        return mask
+
+    def nbytes(self):
+        return self.ids.nbytes + sum(f.bits.nbytes for f in self.fields.values())
+
+    def save(self, path):
+        """Сохраняет в .npz рядом с датасетом"""
+        arrays = {"ids": self.ids}
+        for name, field in self.fields.items():
+            arrays[f"{name}_bits"] = field.bits
+            arrays[f"{name}_labels"] = np.array(field.labels, dtype=str)
+        np.savez_compressed(path, **arrays)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            names = [key[:-5] for key in data.files if key.endswith("_bits")]
+            fields = {n: LabelBits(data[f"{n}_labels"].tolist(), data[f"{n}_bits"]) for n in names}
+            return cls(data["ids"], fields)
+
+
+def labels_path(dataset_path):
+    """games_5k_X.csv -> games_5k_X.labels.npz (рядом с датасетом)"""
+    return os.path.splitext(dataset_path)[0] + ".labels.npz"
+
+
+def save_labels(df, dataset_path):
+    return GameLabels.from_frame(df).save(labels_path(dataset_path))
+
+
+def load_labels(dataset_path):
+    """Битовые матрицы датасета; если файла нет или он от другой версии датасета — None"""
+    path = labels_path(dataset_path)
+    if not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(dataset_path):
+        return None
+    return GameLabels.load(path)
+
+
+if __name__ == "__main__":
+    games = pd.read_csv(GAMES_FILE, encoding="utf-8-sig", na_values=["N/A"])
+    labels = GameLabels.from_frame(games)
+    text_bytes = sum(games[f].memory_usage(deep=True) for f in FIELDS)
+    print(f"Игр: {len(games)}; строки genres/stores/tags: {text_bytes / 1e6:.2f} МБ, "
+          f"битовые матрицы: {labels.nbytes() / 1e6:.3f} МБ")
+
+    started = time.perf_counter()
+    by_strings = (games["genres"].fillna("").str.split(",").apply(lambda l: "Shooter" in [g.strip() for g in l])
+                  & games["stores"].fillna("").str.contains("GOG|Epic Games"))
+    strings_time = time.perf_counter() - started
+    started = time.perf_counter()
+    by_bits = labels.filter(any_of={"stores": ["GOG", "Epic Games"]}, all_of={"genres": ["Shooter"]})
+    bits_time = time.perf_counter() - started
+    print(f"Shooter в GOG/Epic: {by_bits.sum()} игр (строки: {by_strings.sum()}); "
+          f"строки {strings_time * 1e3:.2f} мс, биты {bits_time * 1e3:.2f} мс")
+    print(labels["genres"].aggregate(games["rating"], "mean").sort_values(ascending=False).head(10).round(2))
@@ -0,0 +1,175 @@
+import os
+import csv
+import time
+import sqlite3
+import threading
+from metrics import METRICS
+
+RESULT_FIELDS = ["title", "release", "price", "url", "error"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS links (
+    url TEXT PRIMARY KEY,
+    state TEXT NOT NULL DEFAULT 'pending',   -- pending / in_flight / done / failed
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_links_state ON links(state);
+CREATE TABLE IF NOT EXISTS results (
+    url TEXT PRIMARY KEY,
+    title TEXT,
+    release TEXT,
+    price TEXT,
+    error TEXT,
+    batch INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_results_batch ON results(batch);
+CREATE TABLE IF NOT EXISTS batches (id INTEGER PRIMARY KEY, owner TEXT, created_at REAL);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+class ProgressStore:
+    """Прогресс и результаты парсинга в SQLite (WAL). Строки результата пишутся
+    по мере готовности, а ссылки считаются обработанными только в finish_batch —
+    после того как data_part-файл пачки записан на диск. При падении раньше
+    ссылки пачки остаются in_flight и при следующем запуске скачиваются заново"""
+
+    def __init__(self, path, commit_every=20):
+        self.path = path
+        self.commit_every = commit_every
+        self._lock = threading.Lock()
+        self._buffer = []
+        # timeout — базу могут делить несколько процессов (воркеры очереди на одной машине)
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        # ссылки, которые были "в работе" при падении, снова ждут обработки
+        with self.conn:
+            self.conn.execute("UPDATE links SET state = 'pending' WHERE state = 'in_flight'")
+
+    def get_meta(self, key, default=None):
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        with self._lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def add_links(self, urls):
+        """Добавляет ссылки в состоянии pending; возвращает число новых"""
+        with self._lock, self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany("INSERT OR IGNORE INTO links (url) VALUES (?)", [(u,) for u in urls])
+            return self.conn.total_changes - before
+
+    def filter_pending(self, urls):
+        """Регистрирует ссылки и возвращает те из них, что еще ждут обработки"""
+        urls = list(urls)
+        if not urls:
+            return []
+        self.add_links(urls)
+        marks = ",".join("?" * len(urls))
+        with self._lock:
+            pending = {row[0] for row in self.conn.execute(
+                f"SELECT url FROM links WHERE state = 'pending' AND url IN ({marks})", urls)}
+        return [u for u in urls if u in pending]
+
+    def sync_links_file(self, filename):
+        """Загружает новые ссылки из CSV, только если файл изменился с прошлого раза"""
+        st = os.stat(filename)
+        stamp = f"{st.st_size}:{st.st_mtime_ns}"
+        if self.get_meta(f"links_file:{filename}") == stamp:
+            return 0
+        with open(filename, encoding="utf-8") as f:
+            added = self.add_links(row[0] for row in csv.reader(f) if row)
+        self.set_meta(f"links_file:{filename}", stamp)
+        return added
+
+    def import_progress_file(self, filename):
+        """Переносит старый progress_X.txt: перечисленные ссылки считаются готовыми"""
+        if not os.path.exists(filename) or self.get_meta(f"imported:{filename}"):
+            return 0
+        with open(filename, encoding="utf-8") as f:
+            links = [(x.strip(), time.time()) for x in f if x.strip()]
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO links (url, state, updated_at) VALUES (?, 'done', ?) "
+                "ON CONFLICT(url) DO UPDATE SET state = 'done'", links)
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, '1')",
+                              (f"imported:{filename}",))
+        return len(links)
+
+    def pending(self, limit=None):
+        """Ссылки в состоянии pending (по индексу, без чтения готовых)"""
+        sql = "SELECT url FROM links WHERE state = 'pending' ORDER BY rowid"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            return [row[0] for row in self.conn.execute(sql)]
+
+    def counts(self):
+        with self._lock:
+            return dict(self.conn.execute("SELECT state, COUNT(*) FROM links GROUP BY state"))
+
+    def mark_in_flight(self, urls):
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "UPDATE links SET state = 'in_flight', attempts = attempts + 1, updated_at = ? WHERE url = ?",
+                [(time.time(), url) for url in urls])
+
+    def record(self, result, batch=None):
+        """Буферизует результат; каждые commit_every записей — одна транзакция
+        (только строка результата, состояние ссылки меняет finish_batch)"""
+        with self._lock:
+            self._buffer.append((result, batch))
+            if len(self._buffer) < self.commit_every:
+                return
+            rows, self._buffer = self._buffer, []
+            self._commit(rows)
+
+    def flush(self):
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+            if rows:
+                self._commit(rows)
+
+    def _commit(self, rows):
+        with METRICS.timer("progress_io"), self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO results (url, title, release, price, error, batch) "
+                "VALUES (:url, :title, :release, :price, :error, :batch)",
+                [{**{k: r.get(k) for k in RESULT_FIELDS}, "batch": batch} for r, batch in rows])
+
+    def finish_batch(self, batch):
+        """Отмечает ссылки пачки готовыми (done/failed); вызывать после записи ее data_part-файла"""
+        self.flush()
+        with self._lock, METRICS.timer("progress_io"), self.conn:
+            self.conn.execute(
+                "UPDATE links SET state = CASE WHEN COALESCE(r.error, '') = '' THEN 'done' ELSE 'failed' END, "
+                "error = r.error, updated_at = ? FROM results r WHERE r.url = links.url AND r.batch = ?",
+                (time.time(), batch))
+
+    def batch_results(self, batch):
+        with self._lock:
+            cur = self.conn.execute(
+                "SELECT title, release, price, url, error FROM results WHERE batch = ?", (batch,))
+            return [dict(zip(RESULT_FIELDS, row)) for row in cur]
+
+    def new_batch(self, owner=None):
+        """Номер следующей пачки. Выдается в транзакции с блокировкой на запись,
+        поэтому процессы с общей базой не получат одинаковых номеров (и файлов)"""
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            with self.conn:
+                return self.conn.execute(
+                    "INSERT INTO batches (id, owner, created_at) SELECT MAX("
+                    "COALESCE((SELECT MAX(id) FROM batches), 0), COALESCE((SELECT MAX(batch) FROM results), 0)) + 1, ?, ?",
+                    (owner, time.time())).lastrowid
+
+    def close(self):
+        self.flush()
+        self.conn.close()
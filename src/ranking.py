@@ -0,0 +1,228 @@
+import time
+import heapq
+
+import numpy as np
+import pandas as pd
+
+from columnar import LIST_SEP
+from rawg_transform import read_games_csv
+
+#CONFIG
+GAMES_FILE = "../data/unmergeddata_from_api/unified_games_20251111_171210.csv"
+MIN_VOTES = 20            # m во взвешенном рейтинге и порог показа средней оценки
+TOP_K = 50                # длина витрины сегмента
+SLACK = 2                 # в куче держится TOP_K * SLACK кандидатов — запас на выбывшие игры
+DISCOVERY_MIN_VOTES = 5   # «высокий рейтинг, мало отзывов»: от 5 до MIN_VOTES отзывов
+COLUMNS = ["id", "name", "slug", "released", "rating", "ratings_count", "genres", "stores", "esrb_rating"]
+
+
+def weighted_rating(votes, rating, m=MIN_VOTES, mean=None):
+    """Взвешенный рейтинг как у IMDb: v/(v+m)*R + m/(v+m)*C, C — средняя оценка по каталогу.
+    Работает с массивами целиком; игры без отзывов получают C"""
+    votes = np.nan_to_num(np.asarray(votes, dtype=float))
+    rating = np.nan_to_num(np.asarray(rating, dtype=float))
+    if mean is None:
+        mean = rating[votes > 0].mean() if (votes > 0).any() else 0.0
+    return votes / (votes + m) * rating + m / (votes + m) * mean
+
+
+def _labels(value):
+    if not isinstance(value, str):
+        return []
+    return list(dict.fromkeys(v for v in LIST_SEP.split(value.strip()) if v))
+
+
+def segment_keys(genres, stores, esrb, votes):
+    """Сегменты игры: весь каталог, жанр, магазин, ESRB, жанр+магазин, жанр+ESRB;
+    для игр с 5..19 отзывами — еще витрины «открытий» (общая и по жанрам)"""
+    keys = [("all",)]
+    keys += [("genre", g) for g in genres]
+    keys += [("store", s) for s in stores]
+    if isinstance(esrb, str):
+        keys.append(("esrb", esrb))
+        keys += [("genre+esrb", g, esrb) for g in genres]
+    keys += [("genre+store", g, s) for g in genres for s in stores]
+    if DISCOVERY_MIN_VOTES <= votes < MIN_VOTES:
+        keys.append(("discovery",))
+        keys += [("discovery", g) for g in genres]
+    return keys
+
+
+class RankingIndex:
+    """Топ-k игр по взвешенному рейтингу для каждого сегмента: min-кучи (score, id)
+    с запасом кандидатов и порогом floor — выше него в куче все игры сегмента.
+    Изменившаяся игра дописывается в кучи своих сегментов, ее прежние записи
+    отбрасываются при чтении; сегмент пересчитывается с нуля, только если выше
+    порога осталось меньше k актуальных игр. Средняя оценка C фиксируется при
+    сборке, чтобы обновление одной игры не меняло баллы остальных (rebuild — пересчет)"""
+
+    def __init__(self, games, m=MIN_VOTES, k=TOP_K):
+        self.m, self.k = m, k
+        self.rebuild(games)
+
+    def rebuild(self, games):
+        games = games.reindex(columns=COLUMNS).drop_duplicates("id", keep="last")
+        self.info = {}
+        votes = games["ratings_count"].to_numpy(dtype=float, na_value=0)
+        rating = games["rating"].to_numpy(dtype=float, na_value=0)
+        self.mean = float(rating[votes > 0].mean()) if (votes > 0).any() else 0.0
+        weighted = weighted_rating(votes, rating, self.m, self.mean)
+        # в витрине «открытий» игры сортируются по самой оценке — отзывов там по определению мало
+        self.scores = {}
+        self.keys = {}
+        pairs = []
+        for game_id, w, r, v, g, s, e, name, slug in zip(games["id"], weighted, rating, votes, games["genres"],
+                                                         games["stores"], games["esrb_rating"], games["name"],
+                                                         games["slug"]):
+            game_id = int(game_id)
+            self.info[game_id] = (name, slug, int(v), float(r))
+            self.scores[game_id] = (round(float(w), 6), float(r))
+            self.keys[game_id] = set(segment_keys(_labels(g), _labels(s), e, v))
+            pairs.extend((key, self._score(game_id, key), game_id) for key in self.keys[game_id])
+        # кандидаты всех сегментов одной сортировкой, затем голова каждой группы
+        df = pd.DataFrame(pairs, columns=["key", "score", "id"]).sort_values(["score", "id"], ascending=False)
+        self.heaps, self.floor = {}, {}
+        for key, group in df.groupby("key", sort=False):
+            scores, ids = group["score"].to_numpy(), group["id"].to_numpy()
+            heap = list(zip(scores[:self.capacity].tolist(), ids[:self.capacity].tolist()))
+            heapq.heapify(heap)
+            self.heaps[key] = heap
+            self.floor[key] = float(scores[self.capacity]) if len(scores) > self.capacity else -np.inf
+
+    @property
+    def capacity(self):
+        return self.k * SLACK
+
+    def _score(self, game_id, key):
+        return self.scores[game_id][1 if key[0] == "discovery" else 0]
+
+    def _valid(self, key, score, game_id):
+        return key in self.keys.get(game_id, ()) and self._score(game_id, key) == score
+
+    def _refill(self, key):
+        """Пересчет одного сегмента по всем его играм — когда запаса в куче не хватило"""
+        members = sorted(((self._score(i, key), i) for i, keys in self.keys.items() if key in keys), reverse=True)
+        if not members:
+            self.heaps.pop(key, None)
+            self.floor.pop(key, None)
+            return
+        heap = members[:self.capacity]
+        heapq.heapify(heap)
+        self.heaps[key] = heap
+        self.floor[key] = members[self.capacity][0] if len(members) > self.capacity else -np.inf
+
+    def update(self, changed=None, removed=()):
+        """Новые и измененные игры (DataFrame с колонками COLUMNS) и id удаленных.
+        Возвращает число сегментов, которые пришлось пересчитать целиком"""
+        touched = set()
+        for game_id in removed:
+            touched |= self.keys.pop(int(game_id), set())
+            self.scores.pop(int(game_id), None)
+            self.info.pop(int(game_id), None)
+        if changed is not None and len(changed):
+            changed = changed.reindex(columns=COLUMNS).drop_duplicates("id", keep="last")
+            votes = changed["ratings_count"].to_numpy(dtype=float, na_value=0)
+            rating = changed["rating"].to_numpy(dtype=float, na_value=0)
+            weighted = weighted_rating(votes, rating, self.m, self.mean)
+            for game_id, w, r, v, g, s, e, name, slug in zip(changed["id"], weighted, rating, votes, changed["genres"],
+                                                             changed["stores"], changed["esrb_rating"],
+                                                             changed["name"], changed["slug"]):
+                game_id = int(game_id)
+                old_keys, old_scores = self.keys.get(game_id, set()), self.scores.get(game_id)
+                self.info[game_id] = (name, slug, int(v), float(r))
+                self.scores[game_id] = (round(float(w), 6), float(r))
+                self.keys[game_id] = set(segment_keys(_labels(g), _labels(s), e, v))
+                touched |= old_keys - self.keys[game_id]
+                for key in self.keys[game_id]:
+                    score = self._score(game_id, key)
+                    if key in old_keys and old_scores is not None and score == old_scores[1 if key[0] == "discovery" else 0]:
+                        continue                      # запись в куче и так актуальна
+                    floor = self.floor.setdefault(key, -np.inf)
+                    if score > floor:
+                        heap = self.heaps.setdefault(key, [])
+                        heapq.heappush(heap, (score, game_id))
+                        if len(heap) > self.capacity:
+                            # вытесненная актуальная запись поднимает порог: ниже него куча неполна
+                            dropped = heapq.heappop(heap)
+                            if self._valid(key, *dropped):
+                                self.floor[key] = max(floor, dropped[0])
+                    touched.add(key)
+        refilled = 0
+        for key in touched:
+            heap = self.heaps.get(key, [])
+            valid = list({(s, i) for s, i in heap if self._valid(key, s, i)})
+            floor = self.floor.get(key, -np.inf)
+            if floor > -np.inf and sum(1 for s, _ in valid if s > floor) < self.k:
+                self._refill(key)
+                refilled += 1
+            elif not valid:
+                self.heaps.pop(key, None)
+                self.floor.pop(key, None)
+            elif len(valid) < len(heap):
+                heapq.heapify(valid)                  # чистка устаревших записей
+                self.heaps[key] = valid
+        return refilled
+
+    def top(self, genre=None, store=None, esrb=None, n=20, discovery=False):
+        """Витрина сегмента: список словарей от лучшей игры к худшей.
+        top(genre="Shooter", store="GOG"); top(discovery=True, genre="Indie")"""
+        if discovery:
+            key = ("discovery", genre) if genre else ("discovery",)
+        elif genre and store:
+            key = ("genre+store", genre, store)
+        elif genre and esrb:
+            key = ("genre+esrb", genre, esrb)
+        elif genre:
+            key = ("genre", genre)
+        elif store:
+            key = ("store", store)
+        elif esrb:
+            key = ("esrb", esrb)
+        else:
+            key = ("all",)
+        # одна игра может оказаться в куче дважды, если ее балл вернулся к прежнему
+        best = heapq.nlargest(n, {e for e in self.heaps.get(key, ()) if self._valid(key, *e)})
+        rows = []
+        for score, game_id in best:
+            name, slug, votes, rating = self.info[game_id]
+            rows.append({
+                "id": game_id, "name": name, "slug": slug, "score": score,
+                "weighted_rating": self.scores[game_id][0], "ratings_count": votes,
+                # средняя оценка показывается только при достаточном числе отзывов
+                "rating": rating if votes >= self.m else None,
+            })
+        return rows
+
+    def segments(self, kind):
+        return sorted(key[1:] for key in self.heaps if key[0] == kind)
+
+
+if __name__ == "__main__":
+    games = read_games_csv(GAMES_FILE)
+    started = time.perf_counter()
+    index = RankingIndex(games)
+    print(f"Индекс: {len(games)} игр, {len(index.heaps)} сегментов, C = {index.mean:.2f}, "
+          f"сборка {time.perf_counter() - started:.2f} с")
+
+    queries = [{}, {"genre": "Shooter"}, {"genre": "Shooter", "store": "GOG"}, {"esrb": "Mature"},
+               {"store": "itch.io"}, {"discovery": True}, {"discovery": True, "genre": "Indie"}]
+    started = time.perf_counter()
+    for _ in range(100):
+        for q in queries:
+            index.top(**q)
+    print(f"Запрос витрины: {(time.perf_counter() - started) / (100 * len(queries)) * 1e3:.2f} мс")
+
+    # полная сортировка, как в ноутбуке, для сравнения
+    started = time.perf_counter()
+    shooters = games[games["genres"].fillna("").str.split(", ").apply(lambda g: "Shooter" in g)]
+    shooters.assign(wr=weighted_rating(shooters["ratings_count"], shooters["rating"])).nlargest(20, "wr")
+    print(f"Полная сортировка сегмента: {(time.perf_counter() - started) * 1e3:.2f} мс")
+
+    changed = games.sample(50, random_state=0).copy()
+    changed["ratings_count"] += 500
+    started = time.perf_counter()
+    refilled = index.update(changed, removed=games["id"].head(5).tolist())
+    print(f"Обновление 50 игр и удаление 5: {(time.perf_counter() - started) * 1e3:.1f} мс, "
+          f"пересчитано сегментов: {refilled}")
+    for row in index.top(genre="Shooter", n=5):
+        print(f"- {row['name']}: {row['score']:.2f} ({row['ratings_count']} отзывов)")
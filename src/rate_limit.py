@@ -0,0 +1,37 @@
+import time
+import asyncio
+import threading
+
+
+class TokenBucket:
+    """Token bucket: в среднем rate запросов в секунду, пики до burst подряд"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1, rate))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens=1):
+        """Резервирует токены и возвращает, сколько секунд надо подождать"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self, tokens=1):
+        """Блокирующее ожидание токена (для потоков)"""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens=1):
+        """Ожидание токена без блокировки event loop"""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
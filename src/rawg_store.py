@@ -0,0 +1,200 @@
+import os
+import glob
+import sqlite3
+
+import pandas as pd
+
+from columnar import LIST_SEP
+from rawg_transform import read_games_csv
+
+#CONFIG
+SOURCE_DIR = "../data/unmergeddata_from_api"   # unified_*_{timestamp}.csv из create_unified_dataset
+STORE_DB = "rawg.sqlite"
+KINDS = ["games", "genres", "platforms", "developers", "stores"]
+
+SCHEMA = """
+CREATE TABLE games (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    slug TEXT,
+    released TEXT,                 -- ISO-дата, сравнивается как строка
+    tba INTEGER,
+    rating REAL,
+    rating_top INTEGER,
+    ratings_count INTEGER,
+    metacritic INTEGER,
+    playtime INTEGER,
+    platforms_count INTEGER,
+    esrb_rating TEXT,
+    background_image TEXT,
+    added INTEGER,
+    suggestions_count INTEGER,
+    updated TEXT
+);
+CREATE TABLE genres (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, slug TEXT, games_count INTEGER, image_background TEXT);
+CREATE TABLE platforms (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, slug TEXT, platforms_count INTEGER, games_count INTEGER);
+CREATE TABLE developers (id INTEGER PRIMARY KEY, name TEXT NOT NULL, slug TEXT, games_count INTEGER, image_background TEXT);
+CREATE TABLE stores (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, slug TEXT, domain TEXT, games_count INTEGER);
+CREATE TABLE tags (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+
+CREATE TABLE game_genres (game_id INTEGER NOT NULL REFERENCES games(id), genre_id INTEGER NOT NULL REFERENCES genres(id),
+                          PRIMARY KEY (genre_id, game_id)) WITHOUT ROWID;
+CREATE TABLE game_stores (game_id INTEGER NOT NULL REFERENCES games(id), store_id INTEGER NOT NULL REFERENCES stores(id),
+                          PRIMARY KEY (store_id, game_id)) WITHOUT ROWID;
+CREATE TABLE game_tags (game_id INTEGER NOT NULL REFERENCES games(id), tag_id INTEGER NOT NULL REFERENCES tags(id),
+                        position INTEGER NOT NULL, PRIMARY KEY (tag_id, game_id)) WITHOUT ROWID;
+
+CREATE INDEX idx_games_slug ON games(slug);
+CREATE INDEX idx_games_released ON games(released);
+CREATE INDEX idx_games_rating ON games(rating);
+CREATE INDEX idx_games_esrb ON games(esrb_rating);
+CREATE INDEX idx_genres_slug ON genres(slug);
+CREATE INDEX idx_platforms_slug ON platforms(slug);
+CREATE INDEX idx_developers_slug ON developers(slug);
+CREATE INDEX idx_stores_slug ON stores(slug);
+CREATE INDEX idx_game_genres_game ON game_genres(game_id);
+CREATE INDEX idx_game_stores_game ON game_stores(game_id);
+CREATE INDEX idx_game_tags_game ON game_tags(game_id);
+"""
+
+GAME_COLUMNS = ["id", "name", "slug", "released", "tba", "rating", "rating_top", "ratings_count", "metacritic",
+                "playtime", "platforms_count", "esrb_rating", "background_image", "added", "suggestions_count", "updated"]
+DIM_COLUMNS = {
+    "genres": ["id", "name", "slug", "games_count", "image_background"],
+    "platforms": ["id", "name", "slug", "platforms_count", "games_count"],
+    "developers": ["id", "name", "slug", "games_count", "image_background"],
+    "stores": ["id", "name", "slug", "domain", "games_count"],
+}
+# колонки игр со списками через запятую -> (справочник, таблица-мост, колонка id в мосте)
+BRIDGES = {
+    "genres": ("genres", "game_genres", "genre_id"),
+    "stores": ("stores", "game_stores", "store_id"),
+    "tags": ("tags", "game_tags", "tag_id"),
+}
+
+
+def latest_files(source_dir=SOURCE_DIR):
+    """Самый свежий unified_{kind}_*.csv для каждого вида данных"""
+    files = {}
+    for kind in KINDS:
+        found = sorted(glob.glob(os.path.join(source_dir, f"unified_{kind}_*.csv")))
+        if found:
+            files[kind] = found[-1]
+    return files
+
+
+def _rows(df, columns):
+    """DataFrame -> строки для executemany: пропуски pandas -> NULL, numpy-числа -> int/float"""
+    df = df.reindex(columns=columns).astype(object)
+    return [tuple(None if pd.isna(v) else (v.item() if hasattr(v, "item") else v) for v in row)
+            for row in df.itertuples(index=False)]
+
+
+def _dim_ids(conn, table, names):
+    """id справочника по имени; имена, которых нет в справочнике (собран не полностью), добавляются"""
+    ids = {name: i for i, name in conn.execute(f"SELECT id, name FROM {table}")}
+    missing = [(n,) for n in sorted(set(names) - set(ids))]
+    if missing:
+        conn.executemany(f"INSERT INTO {table} (name) VALUES (?)", missing)
+        ids = {name: i for i, name in conn.execute(f"SELECT id, name FROM {table}")}
+    return ids
+
+
+def build_store(files=None, db_path=STORE_DB):
+    """Собирает базу заново во временном файле и подменяет старую: игры — таблица фактов,
+    жанры/платформы/разработчики/магазины/теги — справочники, genres/stores/tags игр — мосты"""
+    files = files or latest_files()
+    if "games" not in files:
+        print("Нет файла unified_games_*.csv")
+        return None
+    tmp = db_path + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    conn = sqlite3.connect(tmp)
+    with conn:
+        conn.executescript(SCHEMA)
+        for kind, columns in DIM_COLUMNS.items():
+            if kind in files:
+                df = pd.read_csv(files[kind], encoding="utf-8-sig", na_values=["N/A"])
+                df = df.drop_duplicates("id")
+                if kind != "developers":
+                    df = df.drop_duplicates("name")
+                conn.executemany(f"INSERT INTO {kind} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                                 _rows(df, columns))
+
+        games = read_games_csv(files["games"]).drop_duplicates("id")
+        games["released"] = games["released"].dt.strftime("%Y-%m-%d")
+        games["updated"] = games["updated"].dt.strftime("%Y-%m-%dT%H:%M:%S")
+        conn.executemany(f"INSERT INTO games ({', '.join(GAME_COLUMNS)}) VALUES ({', '.join('?' * len(GAME_COLUMNS))})",
+                         _rows(games, GAME_COLUMNS))
+
+        for column, (dim, bridge, id_column) in BRIDGES.items():
+            pairs = []
+            for game_id, value in zip(games["id"], games[column]):
+                if pd.isna(value):
+                    continue
+                names = list(dict.fromkeys(n for n in LIST_SEP.split(str(value)) if n))
+                pairs.extend((int(game_id), name, pos) for pos, name in enumerate(names))
+            ids = _dim_ids(conn, dim, [name for _, name, _ in pairs])
+            if bridge == "game_tags":
+                conn.executemany("INSERT INTO game_tags (game_id, tag_id, position) VALUES (?, ?, ?)",
+                                 [(g, ids[n], p) for g, n, p in pairs])
+            else:
+                conn.executemany(f"INSERT INTO {bridge} (game_id, {id_column}) VALUES (?, ?)",
+                                 [(g, ids[n]) for g, n, _ in pairs])
+    conn.execute("ANALYZE")
+    conn.close()
+    os.replace(tmp, db_path)
+    print(f"База {db_path} собрана из {len(files)} файлов: {len(games)} игр")
+    return db_path
+
+
+def connect(db_path=STORE_DB):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+# типовые запросы EDA: все идут по индексам, а не полным просмотром
+def games_by_genre(conn, genre_slug, released_from=None, released_to=None, limit=50):
+    return conn.execute("""
+        SELECT g.* FROM genres ge
+        JOIN game_genres gg ON gg.genre_id = ge.id
+        JOIN games g ON g.id = gg.game_id
+        WHERE ge.slug = ? AND g.released BETWEEN ? AND ?
+        ORDER BY g.rating DESC LIMIT ?""",
+        (genre_slug, released_from or "0000", released_to or "9999", limit)).fetchall()
+
+
+def games_by_store(conn, store_slug, limit=50):
+    return conn.execute("""
+        SELECT g.* FROM stores s
+        JOIN game_stores gs ON gs.store_id = s.id
+        JOIN games g ON g.id = gs.game_id
+        WHERE s.slug = ? ORDER BY g.rating DESC LIMIT ?""", (store_slug, limit)).fetchall()
+
+
+def genre_summary(conn):
+    """Число игр, средний рейтинг и metacritic по жанрам"""
+    return conn.execute("""
+        SELECT ge.name, COUNT(*) AS games, ROUND(AVG(g.rating), 2) AS rating, ROUND(AVG(g.metacritic), 1) AS metacritic
+        FROM game_genres gg JOIN genres ge ON ge.id = gg.genre_id JOIN games g ON g.id = gg.game_id
+        GROUP BY ge.id ORDER BY games DESC""").fetchall()
+
+
+def game_by_slug(conn, slug):
+    game = conn.execute("SELECT * FROM games WHERE slug = ?", (slug,)).fetchone()
+    if game is None:
+        return None
+    result = dict(game)
+    for column, (dim, bridge, id_column) in BRIDGES.items():
+        result[column] = [row[0] for row in conn.execute(
+            f"SELECT d.name FROM {bridge} b JOIN {dim} d ON d.id = b.{id_column} WHERE b.game_id = ?", (game["id"],))]
+    return result
+
+
+if __name__ == "__main__":
+    build_store()
+    conn = connect()
+    for row in genre_summary(conn)[:10]:
+        print(dict(row))
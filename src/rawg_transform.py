@@ -0,0 +1,202 @@
+import re
+import json
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# те же слова, что и в построчной фильтрации RAWGDataCollector._process_game
+TEST_KEYWORDS = ['test', 'demo', 'prototype', 'sample', 'template', 'debug', 'trash', 'junk', 'example']
+TEST_RE = re.compile("|".join(map(re.escape, TEST_KEYWORDS)))
+FUTURE_RE = re.compile(r"20[3-9]")                 # подозрительные даты выхода (2030-2099)
+MIN_RATINGS = 5
+
+# колонки итоговой таблицы и их nullable-типы: пропуск — <NA>, а не строка 'N/A'
+GAME_DTYPES = {
+    'id': 'Int64',
+    'name': 'string',
+    'slug': 'string',
+    'released': 'datetime64[s]',
+    'tba': 'boolean',
+    'rating': 'Float64',
+    'rating_top': 'Int64',
+    'ratings_count': 'Int64',
+    'metacritic': 'Int64',
+    'playtime': 'Int64',
+    'platforms_count': 'Int64',
+    'genres': 'string',
+    'stores': 'string',
+    'tags': 'string',
+    'esrb_rating': 'string',
+    'background_image': 'string',
+    'added': 'Int64',
+    'suggestions_count': 'Int64',
+    'updated': 'datetime64[s]',
+}
+
+# файлы для __main__: сырые страницы из чекпоинта collect_5k_games
+CHECKPOINT_FILE = "rawg_data/games_checkpoint.jsonl"
+BENCH_REPEAT = 3
+
+
+# поля /games, которые читает преобразование; остальные ключи ответа не разбираются
+RAW_FIELDS = ['id', 'name', 'slug', 'released', 'tba', 'rating', 'rating_top', 'ratings_count', 'metacritic',
+              'playtime', 'platforms', 'genres', 'stores', 'tags', 'esrb_rating', 'background_image', 'added',
+              'suggestions_count']
+
+
+def raw_frame(raw_games):
+    """Сырые записи -> таблица object-колонок одной сборкой pandas. В object-колонках
+    явный null остается None, а отсутствующий ключ становится nan — их можно различить
+    (json_normalize и pyarrow.Table.from_pylist превращают оба случая в один пропуск)"""
+    return pd.DataFrame(raw_games, columns=RAW_FIELDS, dtype=object)
+
+
+def _get(col, default):
+    """Колонка как game.get(name, default): отсутствующий ключ -> default, null остается None"""
+    values = col.to_numpy()
+    missing = pd.isna(values) & (values != None)    # поэлементно: у null значение None, у пропуска nan
+    return col.mask(missing, default)
+
+
+def _numbers(col):
+    """Колонка чисел/None -> float, None -> nan"""
+    return pd.to_numeric(col, errors='coerce').astype(float)
+
+
+def _names(col, path=('name',), limit=None):
+    """Склейка имен из списков словарей: genres -> 'Action, RPG' (не список или нет имен -> None).
+    Списки переводятся в arrow list<struct> (лишние ключи словарей отбрасываются),
+    имена достаются и склеиваются compute-функциями без цикла по играм"""
+    item_type = pa.string()
+    for key in reversed(path):
+        item_type = pa.struct([(key, item_type)])
+    lists = pa.array(col.where(col.map(type).eq(list), None), type=pa.list_(item_type), from_pandas=True)
+    if limit is not None:
+        lists = pc.list_slice(lists, 0, limit)
+    names = pc.list_flatten(lists)
+    for key in path:
+        names = pc.struct_field(names, key)
+    keep = pc.fill_null(pc.not_equal(names, ''), False)
+    names = names.filter(keep)
+    parents = pc.list_parent_indices(lists).filter(keep).to_numpy()
+    counts = np.bincount(parents, minlength=len(lists))
+    offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int32)
+    joined = pc.binary_join(pa.ListArray.from_arrays(offsets, names), ', ').to_pandas()
+    return joined.where(counts > 0, None).set_axis(col.index)
+
+
+def _field(col, key):
+    """Строковое поле вложенного словаря: esrb_rating -> 'Mature' (не словарь -> None)"""
+    structs = pa.array(col.where(col.map(type).eq(dict), None), type=pa.struct([(key, pa.string())]), from_pandas=True)
+    return pc.struct_field(structs, key).to_pandas().set_axis(col.index)
+
+
+def filter_mask(raw_games):
+    """Булев массив игр, прошедших фильтры: ключевые слова ищутся одним регулярным
+    выражением по строковой колонке, числовые фильтры — по массивам сразу для всех.
+    Пропуски трактуются как в построчном _process_game: отсутствующие rating, metacritic
+    и ratings_count равны 0, а null — не ноль (для ratings_count — игра отбрасывается;
+    null в name или slug там давал исключение, и игра тоже отбрасывалась)"""
+    raw = raw_games if isinstance(raw_games, pd.DataFrame) else raw_frame(raw_games)
+    names = _get(raw['name'], '').astype('string')
+    slugs = _get(raw['slug'], '').astype('string')
+    text_ok = ~(names + ' ' + slugs).str.lower().str.contains(TEST_RE.pattern, regex=True).fillna(True)
+    released = raw['released'].astype('string')
+    date_ok = released.str.len().gt(0).fillna(False) & ~released.str.match(FUTURE_RE.pattern).fillna(True)
+    has_ok = _numbers(raw['id']).fillna(0).ne(0) & names.str.len().gt(0).fillna(False)
+    # null != 0, поэтому nan (null) не попадает под «нулевой рейтинг»
+    rating = _numbers(_get(raw['rating'], 0))
+    metacritic = _numbers(_get(raw['metacritic'], 0))
+    ratings_count = _numbers(_get(raw['ratings_count'], 0))
+    mask = text_ok & date_ok & has_ok & ~((rating == 0) & (metacritic == 0)) & (ratings_count >= MIN_RATINGS)
+    return mask.to_numpy(dtype=bool)
+
+
+def count_kept(raw_games):
+    """Сколько игр из списка сырых записей пройдет фильтры"""
+    return int(filter_mask(raw_games).sum()) if raw_games else 0
+
+
+def games_frame(raw_games, updated=None):
+    """Пакетное преобразование сырых записей /games в типизированную таблицу:
+    записи один раз собираются в DataFrame, фильтры и преобразования идут по колонкам
+    (.str, to_numeric, to_datetime), вложенные списки разбираются только у прошедших фильтр"""
+    if not raw_games:
+        return empty_frame()
+    raw = raw_frame(raw_games)
+    raw = raw[filter_mask(raw)].reset_index(drop=True)
+    frame = pd.DataFrame({
+        'id': _numbers(raw['id']),
+        'name': raw['name'],
+        'slug': raw['slug'],
+        'released': pd.to_datetime(raw['released'], errors='coerce', format='%Y-%m-%d'),
+        # как в _process_game: нет ключа — значение по умолчанию, null — пропуск (<NA>)
+        'tba': _get(raw['tba'], False),
+        'rating': _numbers(_get(raw['rating'], 0)),
+        'rating_top': _numbers(_get(raw['rating_top'], 0)),
+        'ratings_count': _numbers(_get(raw['ratings_count'], 0)),
+        'metacritic': _numbers(raw['metacritic']),
+        'playtime': _numbers(_get(raw['playtime'], 0)),
+        'platforms_count': raw['platforms'].where(raw['platforms'].map(type).eq(list)).str.len().fillna(0),
+        'genres': _names(raw['genres']),
+        'stores': _names(raw['stores'], path=('store', 'name')),
+        'tags': _names(raw['tags'], limit=5),
+        'esrb_rating': _field(raw['esrb_rating'], 'name'),
+        'background_image': raw['background_image'].mask(raw['background_image'].eq(''), None),
+        'added': _numbers(_get(raw['added'], 0)),
+        'suggestions_count': _numbers(_get(raw['suggestions_count'], 0)),
+        'updated': updated or datetime.now(),
+    })
+    return frame.astype(GAME_DTYPES)
+
+
+def empty_frame():
+    return pd.DataFrame({name: pd.Series(dtype=dtype) for name, dtype in GAME_DTYPES.items()})
+
+
+def read_games_csv(path):
+    """Читает CSV игр с типами GAME_DTYPES; старые файлы со строкой 'N/A' тоже читаются"""
+    df = pd.read_csv(path, encoding='utf-8-sig', na_values=['N/A'], keep_default_na=True)
+    for name, dtype in GAME_DTYPES.items():
+        if name not in df.columns:
+            continue
+        if dtype.startswith('datetime'):
+            df[name] = pd.to_datetime(df[name], errors='coerce', format='mixed').astype(dtype)
+        else:
+            df[name] = df[name].astype(dtype)
+    return df
+
+
+def benchmark(raw_games, row_transform, repeat=BENCH_REPEAT):
+    """Сравнение построчной обработки (row_transform — функция одной игры) с games_frame"""
+    timings = {}
+    for name, run in (('loop', lambda: [g for g in map(row_transform, raw_games) if g is not None]),
+                      ('columnar', lambda: games_frame(raw_games))):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = run()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        timings[name] = {'seconds': round(best, 4), 'rows': len(result)}
+    timings['speedup'] = round(timings['loop']['seconds'] / timings['columnar']['seconds'], 1)
+    return timings
+
+
+if __name__ == "__main__":
+    from api1 import RAWGDataCollector
+
+    raw_games = []
+    with open(CHECKPOINT_FILE, encoding='utf-8') as f:
+        for line in f:
+            raw_games.extend(json.loads(line)['records'])
+    collector = RAWGDataCollector(api_key=None, use_cache=False)
+    result = benchmark(raw_games, collector._process_game)
+    print(f"Игр на входе: {len(raw_games)}")
+    for name in ('loop', 'columnar'):
+        print(f"- {name}: {result[name]['seconds']} с, строк: {result[name]['rows']}")
+    print(f"Ускорение: x{result['speedup']}")
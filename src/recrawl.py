@@ -0,0 +1,199 @@
+import os
+import csv
+import time
+import hashlib
+import sqlite3
+from datetime import date, datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from columnar import read_parquet
+from fetchers import HttpFetcher
+from merge import merge_results
+from steam_fields import parse_release_date
+
+#CONFIG
+SNAPSHOT_BASE = "steam_final_dataset"     # результат merge.py: .parquet (и .csv при EXPORT_CSV)
+RESULTS_DIR = "results"                   # части для merge.py: дельта обхода пишется сюда же
+FINGERPRINT_DB = "fingerprints.sqlite"
+RECRAWL_THREADS = 20
+RECRAWL_LIMIT = None      # страниц за запуск (None — все, в порядке приоритета)
+NEW_RELEASE_DAYS = 90     # игры моложе этого проверяются в первую очередь
+COMMIT_EVERY = 200
+FIELDS = ["title", "release", "price", "url", "error"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    fields_hash TEXT,
+    release_date TEXT,
+    discounted INTEGER NOT NULL DEFAULT 0,
+    checked_at REAL,
+    changed_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_fingerprints_priority ON fingerprints(discounted, release_date, checked_at);
+"""
+
+
+def fields_hash(record):
+    """Отпечаток извлеченных полей, если сервер не дал ETag/Last-Modified"""
+    raw = "\x1f".join(str(record.get(k) or "") for k in ("title", "release", "price"))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class FingerprintStore:
+    """Отпечатки страниц игр для инкрементального обхода"""
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def seed(self, rows):
+        """Заводит отпечатки по строкам прошлого снимка (известные ссылки не трогает)"""
+        with self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO fingerprints (url, fields_hash, release_date) VALUES (?, ?, ?)",
+                ((r["url"], None if r.get("error") else fields_hash(r), _iso(parse_release_date(r.get("release"))))
+                 for r in rows if r.get("url")))
+            return self.conn.total_changes - before
+
+    def add_urls(self, urls):
+        """Новые ссылки без отпечатка (попадут в дельту как new)"""
+        with self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany("INSERT OR IGNORE INTO fingerprints (url) VALUES (?)", ((u,) for u in urls))
+            return self.conn.total_changes - before
+
+    def priority_order(self, limit=None, new_release_days=NEW_RELEASE_DAYS):
+        """Отпечатки к проверке: сначала игры со скидкой и новинки, затем давно не проверявшиеся"""
+        cutoff = _iso(date.today() - timedelta(days=new_release_days))
+        sql = ("SELECT url, etag, last_modified, fields_hash FROM fingerprints "
+               "ORDER BY discounted DESC, COALESCE(release_date >= ?, 0) DESC, COALESCE(checked_at, 0) ASC")
+        params = [cutoff]
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        keys = ("url", "etag", "last_modified", "fields_hash")
+        return [dict(zip(keys, row)) for row in self.conn.execute(sql, params)]
+
+    def update_many(self, updates):
+        """updates: (url, etag, last_modified, fields_hash, release_date, discounted, changed)"""
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE fingerprints SET etag = ?, last_modified = ?, "
+                "fields_hash = COALESCE(?, fields_hash), release_date = COALESCE(?, release_date), "
+                "discounted = COALESCE(?, discounted), checked_at = ?, "
+                "changed_at = CASE WHEN ? THEN ? ELSE changed_at END WHERE url = ?",
+                [(etag, lm, h, rd, disc, now, changed, now, url)
+                 for url, etag, lm, h, rd, disc, changed in updates])
+
+    def close(self):
+        self.conn.close()
+
+
+def _iso(d):
+    return d.isoformat() if d else None
+
+
+def iter_snapshot(path_base):
+    """Строки прошлого снимка с исходными текстами полей: из Parquet (пишется всегда), иначе из CSV"""
+    if os.path.isdir(f"{path_base}.parquet"):
+        df = read_parquet(f"{path_base}.parquet", columns=["title", "release_text", "price_text", "url", "error"])
+        df = df.rename(columns={"release_text": "release", "price_text": "price"})
+        yield from df.astype(object).where(df.notna(), None).to_dict("records")
+    elif os.path.exists(f"{path_base}.csv"):
+        with open(f"{path_base}.csv", encoding="utf-8-sig", newline="") as f:
+            yield from csv.DictReader(f)
+
+
+def check_page(fetcher, fp):
+    """Условный запрос одной страницы: (запись или None при 304, валидаторы, скидка)"""
+    return fetcher.fetch_conditional(fp["url"], fp["etag"], fp["last_modified"])
+
+
+def write_outputs(changes, timestamp, results_dir=RESULTS_DIR):
+    """Дельта-файл с изменениями и часть results/recrawl_part_*.csv в формате data_part:
+    снимок обновляет merge_parts, поэтому Parquet, индекс и CSV меняются вместе"""
+    delta_file = f"steam_delta_{timestamp}.csv"
+    with open(delta_file, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.DictWriter(f, fieldnames=["change"] + FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        for url, (change, record) in changes.items():
+            writer.writerow({"change": change, **record})
+
+    os.makedirs(results_dir, exist_ok=True)
+    part_file = os.path.join(results_dir, f"recrawl_part_{timestamp}.csv")
+    # через временный файл: merge никогда не увидит недописанную часть
+    with open(part_file + ".tmp", "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(record for _, record in changes.values())
+    os.replace(part_file + ".tmp", part_file)
+    return delta_file, part_file
+
+
+def recrawl(snapshot_base=SNAPSHOT_BASE, limit=RECRAWL_LIMIT, links_file=None):
+    """Инкрементальный обход: условные запросы, перепарсинг только изменившихся страниц;
+    links_file — свежий список ссылок (например, steam_links.csv) для поиска новых игр"""
+    store = FingerprintStore(FINGERPRINT_DB)
+    seeded = store.seed(iter_snapshot(snapshot_base))
+    if links_file and os.path.exists(links_file):
+        with open(links_file, encoding="utf-8") as f:
+            seeded += store.add_urls(row[0] for row in csv.reader(f) if row)
+    fingerprints = store.priority_order(limit)
+    print(f"Инкрементальный обход: {len(fingerprints)} страниц к проверке ({seeded} новых отпечатков)")
+
+    fetcher = HttpFetcher(pool_size=RECRAWL_THREADS)
+    changes = {}
+    updates = []
+    stats = {"not_modified": 0, "unchanged": 0, "changed": 0, "new": 0, "errors": 0}
+    started = time.time()
+    with ThreadPoolExecutor(RECRAWL_THREADS) as ex:
+        futures = {ex.submit(check_page, fetcher, fp): fp for fp in fingerprints}
+        for f in as_completed(futures):
+            url, old_hash = futures[f]["url"], futures[f]["fields_hash"]
+            try:
+                record, validators, discounted = f.result()
+            except Exception as e:
+                stats["errors"] += 1
+                print(f"Ошибка страницы {url}: {e}")
+                continue
+            if record is None:
+                stats["not_modified"] += 1
+                updates.append((url, validators["etag"], validators["last_modified"], None, None, None, False))
+            else:
+                new_hash = fields_hash(record)
+                changed = new_hash != old_hash
+                if changed:
+                    kind = "changed" if old_hash else "new"
+                    changes[url] = (kind, record)
+                    stats[kind] += 1
+                else:
+                    stats["unchanged"] += 1
+                release = _iso(parse_release_date(record["release"]))
+                updates.append((url, validators["etag"], validators["last_modified"],
+                                new_hash, release, int(discounted), changed))
+            if len(updates) >= COMMIT_EVERY:
+                store.update_many(updates)
+                updates = []
+    store.update_many(updates)
+    store.close()
+
+    elapsed = time.time() - started
+    print(f"Готово за {elapsed:.0f} с: " + ", ".join(f"{k}: {v}" for k, v in stats.items()))
+    if not changes:
+        print("Изменений нет, снимок не меняется")
+        return changes
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    delta_file, part_file = write_outputs(changes, timestamp)
+    print(f"Изменения сохранены в {delta_file} и {part_file}")
+    # новая часть — самая свежая, поэтому при дедупликации по ссылке ее строки заменяют прежние
+    merge_results()
+    return changes
+
+
+if __name__ == "__main__":
+    recrawl()
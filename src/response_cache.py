@@ -0,0 +1,79 @@
+import json
+import time
+import zlib
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    endpoint TEXT NOT NULL,
+    data BLOB NOT NULL,          -- JSON, сжатый zlib
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed);
+"""
+
+
+class ResponseCache:
+    """Дисковый кеш ответов API: ключ — endpoint + нормализованные параметры (без key),
+    TTL, вытеснение давно не использованных записей при превышении max_bytes"""
+
+    def __init__(self, path, ttl=7 * 24 * 3600, max_bytes=500 * 1024 * 1024, cache_only=False):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.cache_only = cache_only    # офлайн-режим: только кеш, в том числе устаревший
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self._total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def make_key(endpoint, params):
+        params = {k: v for k, v in (params or {}).items() if k != 'key'}
+        return endpoint.strip('/') + '?' + json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+
+    def get(self, endpoint, params):
+        key = self.make_key(endpoint, params)
+        with self._lock:
+            row = self.conn.execute("SELECT data, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or (not self.cache_only and time.time() - row[1] > self.ttl):
+                self.misses += 1
+                return None
+            with self.conn:
+                self.conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, endpoint, params, data):
+        key = self.make_key(endpoint, params)
+        blob = zlib.compress(json.dumps(data, ensure_ascii=False).encode('utf-8'), 6)
+        now = time.time()
+        with self._lock, self.conn:
+            old = self.conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, endpoint, data, size, created, accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?)", (key, endpoint, blob, len(blob), now, now))
+            self._total += len(blob) - (old[0] if old else 0)
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # LRU: удаляем самые давно прочитанные записи, пока не останется 90% лимита
+        target = self.max_bytes * 0.9
+        for key, size in self.conn.execute(
+                "SELECT key, size FROM responses ORDER BY accessed").fetchall():
+            if self._total <= target:
+                break
+            self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._total -= size
+
+    def stats(self):
+        with self._lock:
+            count = self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {'entries': count, 'bytes': self._total, 'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,85 @@
+import json
+import time
+import heapq
+import random
+import threading
+from collections import defaultdict
+from metrics import METRICS
+
+
+class RetryQueue:
+    """Очередь повторов внутри одного запуска: экспоненциальная задержка,
+    лимит попыток на ссылку и итоговый отчет по классам ошибок"""
+
+    def __init__(self, max_attempts=4, base_delay=5, max_delay=300, limits=None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.limits = limits or {}        # свой лимит попыток для отдельных классов ошибок
+        self.attempts = defaultdict(int)
+        self.failures = {}                # url -> окончательная ошибка
+        self._heap = []
+        self._lock = threading.Lock()
+
+    def next_delay(self, res):
+        """Учитывает попытку; возвращает задержку до повтора или None, если повторять не надо"""
+        url = res["url"]
+        with self._lock:
+            self.attempts[url] += 1
+            if not res.get("error"):
+                return None
+            cls = res.get("error_class", "other")
+            attempt = self.attempts[url]
+            if attempt >= self.limits.get(cls, self.max_attempts):
+                self.failures[url] = {"url": url, "error": res["error"], "error_class": cls, "attempts": attempt}
+                METRICS.inc("failures_total", error_class=cls)
+                return None
+        METRICS.inc("retries_total", error_class=cls)
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        if cls == "rate_limited":
+            delay = min(self.max_delay, delay * 4)
+        return delay * random.uniform(0.8, 1.2)
+
+    def schedule(self, res):
+        """True — ссылка поставлена на повтор; False — результат окончательный"""
+        delay = self.next_delay(res)
+        if delay is None:
+            return False
+        with self._lock:
+            heapq.heappush(self._heap, (time.monotonic() + delay, res["url"]))
+            METRICS.set_gauge("queue_depth", len(self._heap), queue="retry")
+        return True
+
+    def pop_ready(self, n=None):
+        """Ссылки, у которых истекла задержка"""
+        ready = []
+        now = time.monotonic()
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now and (n is None or len(ready) < n):
+                ready.append(heapq.heappop(self._heap)[1])
+        return ready
+
+    def wait_time(self):
+        """Сколько ждать до ближайшего повтора (None — повторов нет)"""
+        with self._lock:
+            if not self._heap:
+                return None
+            return max(0.0, self._heap[0][0] - time.monotonic())
+
+    def __len__(self):
+        with self._lock:
+            return len(self._heap)
+
+    def report(self):
+        by_class = defaultdict(list)
+        for failure in self.failures.values():
+            by_class[failure["error_class"]].append(failure)
+        return dict(by_class)
+
+    def save_report(self, path):
+        report = self.report()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        summary = ", ".join(f"{cls}: {len(items)}" for cls, items in report.items()) or "нет"
+        print(f"Окончательные ошибки ({summary}) сохранены в {path}")
+        return report
@@ -0,0 +1,61 @@
+import re
+from datetime import date
+
+# сокращения месяцев на русской витрине Steam ("9 фев. 2022 г.", "24 мая. 2019 г.")
+RU_MONTHS = {
+    "янв": 1, "фев": 2, "мар": 3, "апр": 4, "мая": 5, "май": 5, "июн": 6,
+    "июл": 7, "авг": 8, "сен": 9, "окт": 10, "ноя": 11, "дек": 12,
+}
+RELEASE_RE = re.compile(r"(\d{1,2})\s+([а-яё]+)\.?\s+(\d{4})", re.IGNORECASE)
+
+
+def parse_release_date(text):
+    """'9 фев. 2022 г.' -> date(2022, 2, 9); None, если дату не распознать"""
+    if not isinstance(text, str):
+        return None
+    m = RELEASE_RE.search(text)
+    if not m:
+        return None
+    month = RU_MONTHS.get(m.group(2).lower()[:3])
+    if month is None:
+        return None
+    try:
+        return date(int(m.group(3)), month, int(m.group(1)))
+    except ValueError:
+        return None
+
+
+# "700 руб.", "Цена для вас:\n70,56 руб.", "Бесплатно", "Free to Play"
+PRICE_RE = re.compile(r"(\d[\d\s]*(?:[.,]\d+)?)\s*(руб|₽|\$|€|₸)", re.IGNORECASE)
+CURRENCIES = {"руб": "RUB", "₽": "RUB", "$": "USD", "€": "EUR", "₸": "KZT"}
+FREE_RE = re.compile(r"бесплатн|free", re.IGNORECASE)
+APP_ID_RE = re.compile(r"store\.steampowered\.com/app/(\d+)")
+
+
+def parse_price(text):
+    """'70,56 руб.' -> (70.56, 'RUB', False); 'Бесплатно' -> (0.0, None, True);
+    (None, None, False), если цены нет (демо, ошибка)"""
+    if not isinstance(text, str):
+        return None, None, False
+    m = PRICE_RE.search(text)
+    if m:
+        amount = float(re.sub(r"\s", "", m.group(1)).replace(",", "."))
+        return amount, CURRENCIES[m.group(2).lower()], False
+    if FREE_RE.search(text) and "demo" not in text.lower():
+        return 0.0, None, True
+    return None, None, False
+
+
+def parse_app_id(url):
+    """'https://store.steampowered.com/app/570/Dota_2/?snr=...' -> 570"""
+    if not isinstance(url, str):
+        return None
+    m = APP_ID_RE.search(url)
+    return int(m.group(1)) if m else None
+
+
+def canonical_app_url(url):
+    """Ссылка на страницу игры без slug и параметров: .../app/570/Dota_2/?snr=1 -> .../app/570/.
+    Ссылки без app id возвращаются как есть"""
+    app_id = parse_app_id(url)
+    return f"https://store.steampowered.com/app/{app_id}/" if app_id else url
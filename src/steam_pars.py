@@ -2,20 +2,55 @@ import os
 import csv
 import time
 import random
+import socket
+import threading
+from queue import Queue
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
+from driver_pool import DriverPool
+from fetchers import HttpFetcher, SeleniumFetcher, classify_error
+from async_crawl import AsyncCrawler
+from progress_store import ProgressStore
+from work_queue import SqliteWorkQueue, HttpWorkQueue, Heartbeat
+from retry import RetryQueue
+from adaptive import AdaptiveLimiter
+from metrics import METRICS
+from stream_merge import merge_parts
 
 #CONFIG
 DEVICE_ID = 1         
 DEVICE_COUNT = 3       
 MAX_THREADS = 5        
 BATCH_SIZE = 40        
+DRIVER_MAX_PAGES = 150  # после стольких страниц браузер пересоздается
+FETCH_BACKEND = "http"  # "http" (requests + lxml, Selenium как запасной) или "selenium"
+HTTP_THREADS = 20       # потоков для http-бэкенда (браузеров все равно не больше MAX_THREADS)
+RATE_LIMIT = 4.0        # asyncio-режим: запросов в секунду (token bucket вместо random sleep)
+RATE_BURST = 8          # asyncio-режим: допустимый всплеск запросов подряд
+PER_HOST_LIMIT = 8      # asyncio-режим: одновременных запросов к одному хосту
+ADAPTIVE_MAX_THREADS = 40  # parse_links: потолок AIMD-регулятора параллельности
 OUTPUT_DIR = "results"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
-PROGRESS_FILE = f"progress_{DEVICE_ID}.txt"
+PROGRESS_DB = f"progress_{DEVICE_ID}.sqlite"
+PROGRESS_FILE = f"progress_{DEVICE_ID}.txt"   # старый формат, импортируется в PROGRESS_DB
+COMMIT_EVERY = 20      # результатов на одну транзакцию в PROGRESS_DB
+QUEUE_URL = None       # адрес координатора (python work_queue.py); None — общая база QUEUE_DB
+QUEUE_DB = "work_queue.sqlite"
+LEASE_SECONDS = 120    # через сколько секунд без heartbeat задача уходит другому воркеру
+WORKER_ID = f"{socket.gethostname()}-{DEVICE_ID}-{os.getpid()}"
+STREAM_QUEUE_SIZE = 200  # потоковый режим: ссылок в очереди на парсинг (backpressure)
+MAX_ATTEMPTS = 4        # попыток на ссылку в рамках одного запуска
+RETRY_LIMITS = {"missing_element": 2, "age_gate": 2}  # свои лимиты для отдельных классов ошибок
+RETRY_BASE_DELAY = 5    # секунд до первого повтора, дальше задержка удваивается
+RETRY_MAX_DELAY = 300
 ERROR_LOG = f"errors_{DEVICE_ID}.log"
+METRICS_FILE = f"metrics_{DEVICE_ID}"  # .json и .prom (Prometheus textfile)
+METRICS_INTERVAL = 30                  # секунд между выгрузками метрик
+FAILURE_REPORT = f"failures_{DEVICE_ID}.json"
+MERGE_INDEX = "steam_full_index.sqlite"  # merge_results: индекс ссылок для дедупликации
 
 def init_driver():
     opts = Options()
@@ -25,104 +60,389 @@ def init_driver():
     opts.add_argument("--disable-dev-shm-usage")
     return webdriver.Chrome(options=opts)
 
+# по одному долгоживущему браузеру на поток вместо запуска Chrome на каждую страницу
+DRIVERS = DriverPool(init_driver, MAX_THREADS, DRIVER_MAX_PAGES)
+HTTP_FETCHER = HttpFetcher(pool_size=HTTP_THREADS)
+SELENIUM_FETCHER = SeleniumFetcher(DRIVERS)
+# в asyncio-режиме темп задает token bucket, поэтому без случайных пауз
+ASYNC_FETCHER = HttpFetcher(pool_size=HTTP_THREADS, delay=None)
+
+def get_fetchers():
+    """Цепочка бэкендов: быстрый http, при неудаче — браузер"""
+    if FETCH_BACKEND == "http":
+        return [HTTP_FETCHER, SELENIUM_FETCHER]
+    return [SELENIUM_FETCHER]
+
 #  ЭТАП 1: СБОР ССЫЛОК (разделяется между устройствами)
-def get_search_pages():
-    """Генерация страниц поиска"""
+def get_search_pages(shard=True):
+    """Генерация страниц поиска (shard=False — все страницы, для общей очереди)"""
     base = "https://store.steampowered.com/search/?category1=998&page="
     pages = [f"{base}{i}" for i in range(1, 401)]
+    if not shard:
+        return pages
     return pages[DEVICE_ID-1::DEVICE_COUNT]
 
 def collect_links_from_page(url):
-    driver = init_driver()
+    """Ссылки на игры со страницы поиска; None — страницу загрузить не удалось"""
     links = set()
     try:
-        driver.get(url)
-        time.sleep(random.uniform(1.5, 2.5))
-        for it in driver.find_elements(By.CSS_SELECTOR, ".search_result_row"):
-            href = it.get_attribute("href")
-            if href:
-                links.add(href.split("?")[0])
+        with DRIVERS.driver() as driver:
+            with METRICS.timer("page_load", backend="selenium", kind="search"):
+                driver.get(url)
+            with METRICS.timer("sleep"):
+                time.sleep(random.uniform(1.5, 2.5))
+            with METRICS.timer("extract", backend="selenium", kind="search"):
+                for it in driver.find_elements(By.CSS_SELECTOR, ".search_result_row"):
+                    href = it.get_attribute("href")
+                    if href:
+                        links.add(href.split("?")[0])
+        METRICS.inc("search_pages_total", status="ok")
     except Exception as e:
+        METRICS.inc("search_pages_total", status="error")
         print(f"Ошибка страницы {url}: {e}")
-    finally:
-        driver.quit()
+        return None
     return list(links)
 
 def collect_links():
     pages = get_search_pages()
     print(f"Устройство {DEVICE_ID}: {len(pages)} страниц поиска")
     all_links = []
-    with ThreadPoolExecutor(MAX_THREADS) as ex:
-        futures = [ex.submit(collect_links_from_page, p) for p in pages]
-        for f in as_completed(futures):
-            all_links.extend(f.result())
+    try:
+        with ThreadPoolExecutor(MAX_THREADS) as ex:
+            futures = [ex.submit(collect_links_from_page, p) for p in pages]
+            for f in as_completed(futures):
+                all_links.extend(f.result() or [])
+    finally:
+        DRIVERS.shutdown()
+    save_links(all_links)
+
+def save_links(all_links):
     filename = f"links_part_{DEVICE_ID}.csv"
     with open(filename, "w", newline="", encoding="utf-8") as f:
         csv.writer(f).writerows([[x] for x in sorted(set(all_links))])
     print(f"Устройство {DEVICE_ID}: сохранено {len(all_links)} ссылок в {filename}")
 
 #ЭТАП 2: ПАРСИНГ ИГР С ВОЗОБНОВЛЕНИЕМ
-def parse_game(link):
-    driver = init_driver()
-    try:
-        driver.get(link)
-        time.sleep(random.uniform(1.5, 3))
-        title = driver.find_element(By.CSS_SELECTOR, ".apphub_AppName").text
-        release = driver.find_element(By.CSS_SELECTOR, ".date").text
-        price_el = driver.find_elements(By.CSS_SELECTOR, ".game_purchase_price, .discount_final_price")
-        price = price_el[0].text if price_el else "N/A"
-        return {"title": title, "release": release, "price": price, "url": link}
-    except Exception as e:
-        with open(ERROR_LOG, "a", encoding="utf-8") as ef:
-            ef.write(f"{link} | {e}\n")
-        return {"url": link, "error": str(e)}
-    finally:
-        driver.quit()
+def parse_game(link, fetchers=None):
+    errors = []
+    for fetcher in fetchers or get_fetchers():
+        try:
+            res = fetcher.fetch(link)
+            METRICS.inc("pages_total", status="ok")
+            return res
+        except Exception as e:
+            errors.append(e)
+    # 429 на быстром бэкенде важнее, чем ошибка запасного браузера на той же странице
+    classes = [classify_error(e) for e in errors]
+    error_class = "rate_limited" if "rate_limited" in classes else classes[-1]
+    METRICS.inc("pages_total", status="error", error_class=error_class)
+    with open(ERROR_LOG, "a", encoding="utf-8") as ef:
+        ef.write(f"{link} | {error_class} | {errors[-1]}\n")
+    return {"url": link, "error": str(errors[-1]), "error_class": error_class}
 
-def get_completed_links():
-    """Считывает список уже обработанных ссылок"""
-    if not os.path.exists(PROGRESS_FILE):
-        return set()
-    with open(PROGRESS_FILE, encoding="utf-8") as f:
-        return set(x.strip() for x in f if x.strip())
+def make_retry_queue():
+    return RetryQueue(MAX_ATTEMPTS, RETRY_BASE_DELAY, RETRY_MAX_DELAY, RETRY_LIMITS)
 
-def update_progress(link):
-    """Добавляет ссылку в лог прогресса"""
-    with open(PROGRESS_FILE, "a", encoding="utf-8") as f:
-        f.write(link + "\n")
+def open_store():
+    """Открывает хранилище прогресса (и один раз переносит старый progress_X.txt)"""
+    store = ProgressStore(PROGRESS_DB, COMMIT_EVERY)
+    imported = store.import_progress_file(PROGRESS_FILE)
+    if imported:
+        print(f"Перенесено {imported} ссылок из {PROGRESS_FILE} в {PROGRESS_DB}")
+    return store
 
-def parse_links():
+def get_thread_count():
+    return HTTP_THREADS if FETCH_BACKEND == "http" else MAX_THREADS
+
+# число одновременных загрузок в parse_links подстраивается под ответы Steam
+LIMITER = AdaptiveLimiter(initial=get_thread_count(), max_limit=ADAPTIVE_MAX_THREADS)
+
+def parse_game_adaptive(link):
+    with LIMITER.slot() as slot:
+        METRICS.set_gauge("concurrency_limit", LIMITER.limit)
+        METRICS.set_gauge("in_flight", LIMITER.in_flight)
+        res = parse_game(link)
+        if res.get("error_class") in ("rate_limited", "timeout"):
+            slot["outcome"] = "throttled"
+        elif res.get("error"):
+            slot["outcome"] = "error"
+    return res
+
+def get_pending_links():
+    """Хранилище прогресса и еще не обработанные ссылки из links_part_X.csv"""
     filename = f"links_part_{DEVICE_ID}.csv"
     if not os.path.exists(filename):
         print(f"Нет файла {filename}. Сначала собери ссылки.")
+        return None, None
+
+    store = open_store()
+    store.sync_links_file(filename)
+    pending = store.pending()
+    counts = store.counts()
+    print(f"Устройство {DEVICE_ID}: {counts.get('done', 0)} готово, "
+          f"{counts.get('failed', 0)} с ошибкой, {len(pending)} осталось.")
+    return store, pending
+
+def save_batch(results, batch_num):
+    out_file = os.path.join(OUTPUT_DIR, f"data_part_{DEVICE_ID}_{batch_num}.csv")
+    # через временный файл: merge никогда не увидит недописанную часть
+    with METRICS.timer("csv_write"), open(out_file + ".tmp", "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["title", "release", "price", "url", "error"])
+        writer.writeheader()
+        writer.writerows(results)
+    os.replace(out_file + ".tmp", out_file)
+    print(f"💾 {DEVICE_ID}: Сохранен файл {out_file} ({len(results)} записей)")
+
+class BatchSink:
+    """Пишет результаты в хранилище и выгружает data_part-файл каждые BATCH_SIZE записей"""
+
+    def __init__(self, store):
+        self.store = store
+        self.batch_num = store.new_batch(WORKER_ID)
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def add(self, res):
+        with self._lock:
+            self.store.record(res, self.batch_num)
+            self.count += 1
+            if self.count >= BATCH_SIZE:
+                self._close_batch()
+
+    def _close_batch(self):
+        # сначала файл пачки, потом отметка ссылок: при падении между ними ссылки скачаются заново
+        self.store.flush()
+        save_batch(self.store.batch_results(self.batch_num), self.batch_num)
+        self.store.finish_batch(self.batch_num)
+        self.batch_num = self.store.new_batch(WORKER_ID)
+        self.count = 0
+
+    def close(self):
+        with self._lock:
+            if self.count:
+                self._close_batch()
+
+def parse_links():
+    store, pending = get_pending_links()
+    if store is None:
+        return
+
+    retries = make_retry_queue()
+    todo = deque(pending)
+    try:
+        with ThreadPoolExecutor(ADAPTIVE_MAX_THREADS) as ex:
+            while todo or retries:
+                # пачка не меньше нескольких "кругов" текущего лимита, чтобы потоки не простаивали
+                size = max(BATCH_SIZE, LIMITER.limit * 4)
+                # сначала повторы, у которых истекла задержка, затем новые ссылки
+                batch = retries.pop_ready(size)
+                while todo and len(batch) < size:
+                    batch.append(todo.popleft())
+                if not batch:
+                    time.sleep(retries.wait_time())
+                    continue
+                # номер выдает хранилище: продолжает прошлые запуски и не пересекается с другими процессами
+                batch_num = store.new_batch(WORKER_ID)
+                store.mark_in_flight(batch)
+                futures = [ex.submit(parse_game_adaptive, link) for link in batch]
+                for f in as_completed(futures):
+                    res = f.result()
+                    if not retries.schedule(res):
+                        store.record(res, batch_num)
+                store.flush()
+                results = store.batch_results(batch_num)
+                if results:
+                    save_batch(results, batch_num)
+                store.finish_batch(batch_num)
+                print(f"Регулятор: {LIMITER.stats()}")
+                with METRICS.timer("sleep"):
+                    time.sleep(random.uniform(2, 5))
+        retries.save_report(FAILURE_REPORT)
+    finally:
+        store.close()
+        DRIVERS.shutdown()
+
+
+#  ASYNCIO-РЕЖИМ: token bucket вместо sleep, без барьеров между пачками
+def make_crawler(fetch, retry=None):
+    return AsyncCrawler(fetch, rate=RATE_LIMIT, burst=RATE_BURST,
+                        per_host=PER_HOST_LIMIT, concurrency=HTTP_THREADS, retry=retry)
+
+def collect_links_async():
+    pages = get_search_pages()
+    print(f"Устройство {DEVICE_ID}: {len(pages)} страниц поиска (asyncio)")
+    all_links = []
+
+    def on_result(url, res):
+        if isinstance(res, Exception):
+            print(f"Ошибка страницы {url}: {res}")
+        else:
+            all_links.extend(res)
+
+    make_crawler(ASYNC_FETCHER.fetch_links).run(pages, on_result)
+    save_links(all_links)
+
+def parse_links_async():
+    store, pending = get_pending_links()
+    if store is None:
         return
 
-    with open(filename, encoding="utf-8") as f:
-        links = [row[0] for row in csv.reader(f)]
+    # пачка — это просто следующие BATCH_SIZE завершившихся ссылок
+    sink = BatchSink(store)
+    retries = make_retry_queue()
+    fetchers = [ASYNC_FETCHER, SELENIUM_FETCHER]
+    store.mark_in_flight(pending)
+    try:
+        crawler = make_crawler(lambda link: parse_game(link, fetchers), retries)
+        crawler.run(pending, lambda url, res: sink.add(res))
+        sink.close()
+        retries.save_report(FAILURE_REPORT)
+    finally:
+        store.close()
+        DRIVERS.shutdown()
+
+
+#  ПОТОКОВЫЙ РЕЖИМ: сбор ссылок и парсинг одновременно
+def stream_crawl(save_links_file=True):
+    """Каждая найденная ссылка сразу идет в ограниченную очередь парсинга;
+    links_part_X.csv при желании сохраняется в конце, как в двухэтапном режиме"""
+    store = open_store()
+    sink = BatchSink(store)
+    retries = make_retry_queue()
+    pages = get_search_pages()
+    links_q = Queue(maxsize=STREAM_QUEUE_SIZE)
+    seen = set()
+    seen_lock = threading.Lock()
+    print(f"Устройство {DEVICE_ID}: потоковый режим, {len(pages)} страниц поиска")
+
+    def produce(page):
+        # страница грузится без блокировки, под ней — только сверка с seen
+        found = collect_links_from_page(page) or []
+        with seen_lock:
+            new = [x for x in found if x not in seen]
+            seen.update(new)
+        # уже обработанные в прошлых запусках ссылки отбрасываются по хранилищу
+        for link in store.filter_pending(new) + retries.pop_ready():
+            links_q.put(link)  # блокируется, если парсеры не успевают
+        METRICS.set_gauge("queue_depth", links_q.qsize(), queue="parse")
 
-    done = get_completed_links()
-    pending = [x for x in links if x not in done]
-    print(f"Устройство {DEVICE_ID}: {len(done)} готово, {len(pending)} осталось.")
+    def consume():
+        while True:
+            link = links_q.get()
+            if link is None:
+                break
+            # task_done в finally: ошибка записи не должна оставить links_q.join() висеть
+            try:
+                res = parse_game(link)
+                if not retries.schedule(res):
+                    sink.add(res)
+            finally:
+                links_q.task_done()
 
-    batch_num = 0
-    for i in range(0, len(pending), BATCH_SIZE):
-        batch = pending[i:i+BATCH_SIZE]
-        results = []
+    parsers = [threading.Thread(target=consume, daemon=True) for _ in range(get_thread_count())]
+    for t in parsers:
+        t.start()
+    try:
         with ThreadPoolExecutor(MAX_THREADS) as ex:
-            futures = [ex.submit(parse_game, link) for link in batch]
-            for f in as_completed(futures):
-                res = f.result()
-                results.append(res)
-                update_progress(res["url"])
+            list(ex.map(produce, pages))
+        # поиск закончен: дожидаемся парсеров и оставшихся повторов
+        while True:
+            links_q.join()
+            if not retries:
+                break
+            time.sleep(retries.wait_time())
+            for link in retries.pop_ready():
+                links_q.put(link)
+        retries.save_report(FAILURE_REPORT)
+    finally:
+        for _ in parsers:
+            links_q.put(None)
+        for t in parsers:
+            t.join()
+        sink.close()
+        store.close()
+        DRIVERS.shutdown()
+    if save_links_file:
+        save_links(seen)
+
 
-        batch_num += 1
-        out_file = os.path.join(OUTPUT_DIR, f"data_part_{DEVICE_ID}_{batch_num}.csv")
-        with open(out_file, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=["title", "release", "price", "url", "error"])
-            writer.writeheader()
-            writer.writerows(results)
-        print(f"💾 {DEVICE_ID}: Сохранен файл {out_file} ({len(results)} записей)")
-        time.sleep(random.uniform(2, 5))
+#  РЕЖИМ ОБЩЕЙ ОЧЕРЕДИ: машины разбирают задачи по мере сил вместо DEVICE_ID-шардов
+def get_queue():
+    if QUEUE_URL:
+        return HttpWorkQueue(QUEUE_URL)
+    return SqliteWorkQueue(QUEUE_DB, LEASE_SECONDS)
+
+def seed_queue():
+    """Ставит в очередь все страницы поиска и уже собранные ссылки (повторы игнорируются)"""
+    queue = get_queue()
+    pages = queue.add("search", get_search_pages(shard=False))
+    links = 0
+    for i in range(1, DEVICE_COUNT + 1):
+        f = f"links_part_{i}.csv"
+        if os.path.exists(f):
+            with open(f, encoding="utf-8") as ff:
+                links += queue.add("app", [row[0] for row in csv.reader(ff) if row])
+    print(f"В очередь добавлено {pages} страниц поиска и {links} ссылок")
+
+def run_queue_worker():
+    """Воркер: берет в аренду пачки ссылок (или страниц поиска), пока очередь не опустеет"""
+    queue = get_queue()
+    store = open_store()
+    retries = make_retry_queue()
+    print(f"Воркер {WORKER_ID} подключен к очереди")
+    try:
+        with Heartbeat(queue, WORKER_ID, LEASE_SECONDS / 3), ThreadPoolExecutor(get_thread_count()) as ex:
+            while True:
+                # ссылки на повторе остаются в аренде этого воркера (ее продлевает heartbeat)
+                links = retries.pop_ready(BATCH_SIZE)
+                if len(links) < BATCH_SIZE:
+                    links += queue.lease("app", WORKER_ID, BATCH_SIZE - len(links))
+                if links:
+                    # несколько воркеров на машине делят PROGRESS_DB и OUTPUT_DIR:
+                    # номер пачки (и имя data_part-файла) выдается через общую базу
+                    batch_num = store.new_batch(WORKER_ID)
+                    store.add_links(links)
+                    store.mark_in_flight(links)
+                    finished = []
+                    for res in ex.map(parse_game, links):
+                        if not retries.schedule(res):
+                            store.record(res, batch_num)
+                            finished.append(res["url"])
+                    store.flush()
+                    if finished:
+                        save_batch(store.batch_results(batch_num), batch_num)
+                    store.finish_batch(batch_num)
+                    # задачи закрываются в очереди, только когда их строки уже в файле
+                    queue.complete("app", WORKER_ID, finished)
+                    continue
+
+                pages = queue.lease("search", WORKER_ID, MAX_THREADS)
+                if pages:
+                    found, done, failed = [], [], []
+                    for page, page_links in zip(pages, ex.map(collect_links_from_page, pages)):
+                        if page_links is None:
+                            failed.append(page)
+                            continue
+                        found.extend(page_links)
+                        done.append(page)
+                    added = queue.add("app", found)
+                    queue.complete("search", WORKER_ID, done)
+                    # неудачные страницы не закрываются, а возвращаются в очередь (heartbeat
+                    # продлевал бы их аренду бесконечно) — их возьмет этот или другой воркер
+                    queue.release("search", WORKER_ID, failed)
+                    print(f"{WORKER_ID}: {len(done)}/{len(pages)} страниц поиска, {added} новых ссылок")
+                    continue
+
+                # свободных задач нет; если чужие аренды или свои повторы активны — ждем
+                if not retries and not queue.stats("app").get("leased") and not queue.stats("search").get("leased"):
+                    break
+                wait = retries.wait_time()
+                time.sleep(LEASE_SECONDS / 6 if wait is None else min(wait, LEASE_SECONDS / 6))
+        retries.save_report(FAILURE_REPORT)
+    finally:
+        store.close()
+        DRIVERS.shutdown()
+    print(f"Воркер {WORKER_ID}: очередь пуста, работа завершена")
 
 
 #  ДОП: Объединение ссылок и результатов
@@ -139,29 +459,37 @@ def merge_links():
     print(f"Объединено {len(all_links)} ссылок в steam_links.csv")
 
 def merge_results():
-    """Объединяет все CSV с результатами"""
-    all_rows = []
+    """Объединяет все CSV с результатами (потоково, с дедупликацией ссылок)"""
+    parts = []
     for root, _, files in os.walk(OUTPUT_DIR):
         for file in files:
             if file.endswith(".csv"):
-                path = os.path.join(root, file)
-                with open(path, encoding="utf-8") as f:
-                    reader = csv.DictReader(f)
-                    all_rows.extend(list(reader))
-    with open("steam_full.csv", "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=["title", "release", "price", "url", "error"])
-        writer.writeheader()
-        writer.writerows(all_rows)
-    print(f"Все части объединены в steam_full.csv ({len(all_rows)} записей)")
+                parts.append(os.path.join(root, file))
+    # от старых к новым: из повторно скачанных ссылок останется последняя успешная строка
+    parts.sort(key=os.path.getmtime)
+    merge_parts(parts, "steam_full", MERGE_INDEX)
 
 #  ОСНОВНОЙ ВХОД
 if __name__ == "__main__":
+    METRICS.start_exporter(METRICS_FILE, METRICS_INTERVAL)
+
     # --- Этап 1: сбор ссылок ---
     # collect_links()
 
     # --- Этап 2: парсинг (с возобновлением) ---
     parse_links()
 
+    # --- потоковый режим: оба этапа сразу ---
+    # stream_crawl()
+
+    # --- режим общей очереди: seed_queue() один раз, затем воркер на каждой машине ---
+    # seed_queue()
+    # run_queue_worker()
+
+    # --- asyncio-режим (RATE_LIMIT запросов/сек вместо случайных пауз) ---
+    # collect_links_async()
+    # parse_links_async()
+
     # --- (опционально после всех устройств) ---
     # merge_links()
     # merge_results()
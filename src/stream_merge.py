@@ -0,0 +1,189 @@
+import os
+import shutil
+import sqlite3
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from columnar import STEAM_SCHEMA, steam_table
+from manifest import PartManifest
+from steam_fields import canonical_app_url
+
+FIELDS = ["title", "release", "price", "url", "error"]
+CHUNK_ROWS = 5000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS merged (
+    key TEXT PRIMARY KEY,        -- каноническая ссылка на игру
+    seq INTEGER NOT NULL,        -- порядок первого появления, в нем пишется результат
+    ok INTEGER NOT NULL,         -- 1 — строка без ошибки
+    run INTEGER NOT NULL,        -- запуск объединения, в котором строка последний раз менялась
+    title TEXT, release TEXT, price TEXT, url TEXT, error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_merged_seq ON merged(seq);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value);
+"""
+
+# более поздняя строка заменяет раннюю, если она успешная или ранняя тоже с ошибкой;
+# точный повтор уже записанной строки ничего не меняет и не требует перезаписи результата
+UPSERT = """
+INSERT INTO merged (key, seq, ok, run, title, release, price, url, error) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(key) DO UPDATE SET ok = excluded.ok, run = excluded.run, title = excluded.title,
+    release = excluded.release, price = excluded.price, url = excluded.url, error = excluded.error
+WHERE excluded.ok >= merged.ok
+    AND (excluded.title, excluded.release, excluded.price, excluded.url, excluded.error)
+        IS NOT (merged.title, merged.release, merged.price, merged.url, merged.error)
+"""
+
+
+def iter_chunks(path, chunk_rows=CHUNK_ROWS):
+    """Части читаются кусками по chunk_rows строк и приводятся к FIELDS:
+    в старых частях нет колонки error, лишние колонки отбрасываются"""
+    for chunk in pd.read_csv(path, dtype=str, keep_default_na=False, encoding="utf-8-sig",
+                             chunksize=chunk_rows):
+        yield chunk.reindex(columns=FIELDS, fill_value="")
+
+
+def open_index(path):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA synchronous=NORMAL")
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(merged)")]
+    if columns and "run" not in columns:
+        conn.execute("DROP TABLE merged")     # индекс старого формата: собираем заново
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _meta(conn, key, default=0):
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else default
+
+
+def _set_meta(conn, key, value):
+    with conn:
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+
+def index_part(conn, path, run, chunk_rows=CHUNK_ROWS):
+    """Добавляет строки части в индекс; возвращает число прочитанных строк"""
+    seq = _meta(conn, "seq")
+    rows = 0
+    for chunk in iter_chunks(path, chunk_rows):
+        batch = []
+        for title, release, price, url, error in chunk.itertuples(index=False):
+            seq += 1
+            # строки без ссылки не с чем сопоставить — каждая остается отдельной
+            key = canonical_app_url(url) if url else f"{path}#{seq}"
+            batch.append((key, seq, 0 if error else 1, run, title, release, price, url, error))
+        with conn:
+            conn.executemany(UPSERT, batch)
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('seq', ?)", (seq,))
+        rows += len(batch)
+    return rows
+
+
+def _write_rows(conn, query, params, parquet_path, csv_file, chunk_rows):
+    written = 0
+    cursor = conn.execute(query, params)
+    with pq.ParquetWriter(parquet_path, STEAM_SCHEMA, compression="zstd") as writer:
+        while True:
+            rows = cursor.fetchmany(chunk_rows)
+            if not rows:
+                break
+            df = pd.DataFrame(rows, columns=FIELDS)
+            writer.write_table(steam_table(df))
+            if csv_file:
+                df.to_csv(csv_file, header=csv_file.tell() == 0, index=False)
+            written += len(rows)
+    return written
+
+
+def write_merged(conn, out_base, run, export_csv=True, chunk_rows=CHUNK_ROWS):
+    """Полная перезапись: {out_base}.parquet — каталог из одного фрагмента, плюс .csv;
+    пишется во временные пути и подменяет старый результат"""
+    out_dir, csv_path = f"{out_base}.parquet", f"{out_base}.csv"
+    tmp_dir = out_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    csv_file = open(csv_path + ".tmp", "w", newline="", encoding="utf-8-sig") if export_csv else None
+    try:
+        written = _write_rows(conn, f"SELECT {', '.join(FIELDS)} FROM merged ORDER BY seq", (),
+                              os.path.join(tmp_dir, f"part-{run:05d}.parquet"), csv_file, chunk_rows)
+    finally:
+        if csv_file:
+            csv_file.close()
+    if os.path.isdir(out_dir):
+        shutil.rmtree(out_dir)
+    elif os.path.exists(out_dir):
+        os.remove(out_dir)                    # одиночный файл от прежних версий
+    os.replace(tmp_dir, out_dir)
+    if export_csv:
+        os.replace(csv_path + ".tmp", csv_path)
+    return written
+
+
+def append_merged(conn, out_base, run, after_seq, export_csv=True, chunk_rows=CHUNK_ROWS):
+    """Дописывает строки новых ссылок (seq > after_seq): новый фрагмент Parquet и хвост CSV"""
+    out_dir, csv_path = f"{out_base}.parquet", f"{out_base}.csv"
+    csv_file = open(csv_path, "a", newline="", encoding="utf-8") if export_csv else None
+    tmp = os.path.join(out_dir, f".part-{run:05d}.parquet.tmp")
+    try:
+        written = _write_rows(conn, f"SELECT {', '.join(FIELDS)} FROM merged WHERE seq > ? ORDER BY seq",
+                              (after_seq,), tmp, csv_file, chunk_rows)
+    finally:
+        if csv_file:
+            csv_file.close()
+    os.replace(tmp, os.path.join(out_dir, f"part-{run:05d}.parquet"))
+    return written
+
+
+def merge_parts(files, out_base, index_path, export_csv=True, chunk_rows=CHUNK_ROWS):
+    """Инкрементальное потоковое объединение частей с дедупликацией по канонической ссылке.
+    Индекс SQLite на диске хранит объединенные строки и манифест частей между запусками:
+    читаются только новые и измененные части, результат дописывается новым фрагментом.
+    Полная перезапись — если часть удалена (индекс тогда собирается заново) или новая
+    строка заменила уже записанную. files — в порядке от старых к новым"""
+    conn = open_index(index_path)
+    manifest = PartManifest(conn)
+    try:
+        todo, removed, info = manifest.scan(files)
+        # результат мог не дописаться, если прошлый запуск упал после индексации
+        outputs_ok = os.path.isdir(f"{out_base}.parquet") and (not export_csv or os.path.exists(f"{out_base}.csv")) \
+            and _meta(conn, "written_run", None) == _meta(conn, "run")
+        if removed:
+            print(f" Удалено частей: {len(removed)} — индекс собирается заново")
+            with conn:
+                conn.execute("DELETE FROM merged")
+                conn.execute("DELETE FROM meta")
+            manifest.forget()
+            todo, _, info = manifest.scan(files)
+        if not todo and outputs_ok:
+            print(" Новых или измененных частей нет, результат актуален")
+            return
+        run = _meta(conn, "run") + 1
+        last_seq = _meta(conn, "seq")
+        total = 0
+        for path in todo:
+            try:
+                rows = index_part(conn, path, run, chunk_rows)
+            except Exception as e:
+                print(f" Ошибка при чтении {path}: {e}")
+                continue
+            manifest.record(path, info[path], rows)
+            total += rows
+            print(f" Добавлен {path} ({rows} строк)")
+        _set_meta(conn, "run", run)
+        replaced = conn.execute("SELECT COUNT(*) FROM merged WHERE run = ? AND seq <= ?",
+                                (run, last_seq)).fetchone()[0]
+        if removed or replaced or not outputs_ok:
+            written = write_merged(conn, out_base, run, export_csv, chunk_rows)
+            print(f"\n Перезаписано {out_base}.parquet{' и .csv' if export_csv else ''}: {written} строк "
+                  f"(заменено ранее записанных: {replaced})")
+        else:
+            written = append_merged(conn, out_base, run, last_seq, export_csv, chunk_rows)
+            print(f"\n Дописано в {out_base}.parquet{' и .csv' if export_csv else ''}: {written} строк")
+        _set_meta(conn, "written_run", run)
+        print(f" Прочитано строк: {total}, всего в результате: "
+              f"{conn.execute('SELECT COUNT(*) FROM merged').fetchone()[0]}")
+    finally:
+        conn.close()
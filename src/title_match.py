@@ -0,0 +1,213 @@
+import re
+import time
+import random
+import unicodedata
+from collections import defaultdict
+from difflib import SequenceMatcher
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from steam_fields import canonical_app_url, parse_app_id, parse_release_date
+
+#CONFIG
+STEAM_FILE = "../data/steam_final_dataset.csv"
+RAWG_FILE = "../data/API_merged.csv"
+MATCHES_FILE = "steam_rawg_matches.csv"
+MIN_SCORE = 0.8           # ниже — пара не считается совпадением
+YEAR_TOLERANCE = 1        # кандидаты с большей разницей в годе выхода отбрасываются
+MAX_POSTING = 300         # слишком частые слова ("simulator", "war") не используются для блокировки
+WORKERS = 4
+CHUNK_SIZE = 500
+BENCH_SAMPLE = 200        # строк Steam для полного перебора в бенчмарке
+
+# хвосты изданий, которые у Steam и RAWG расходятся: снимаются только в конце названия
+# (после пробела или разделителя ":", "-", "("), чтобы не трогать "Gold Rush" и "PC Building Simulator"
+EDITION_WORDS = (r"(?:game of the year|goty|definitive|deluxe|complete|ultimate|gold|premium|enhanced|special|"
+                 r"collector'?s|anniversary|digital|standard|remastered|pc|director'?s cut)(?: edition)?|edition")
+EDITION_RE = re.compile(rf"(?:(?:\s*[:\-\u2013\u2014(\[]\s*|\s+)(?:{EDITION_WORDS})\b\s*[)\]]?)+\s*$")
+ROMAN = {"ii": "2", "iii": "3", "iv": "4", "v": "5", "vi": "6", "vii": "7", "viii": "8", "ix": "9", "x": "10"}
+STOPWORDS = {"the", "a", "an", "of", "and", "in", "on", "to", "for"}
+NON_WORD_RE = re.compile(r"[^\w]+")
+
+
+def normalize_title(title):
+    """'DOOM® Eternal: Deluxe Edition' -> 'doom eternal'"""
+    if not isinstance(title, str):
+        return ""
+    # знаки ™/®/© убираются до NFKD, иначе ™ превращается в "TM"
+    text = title.replace("™", " ").replace("®", " ").replace("©", " ").replace("&", " and ")
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower().replace("'", "").replace("’", "")
+    text = EDITION_RE.sub(" ", text)
+    words = [ROMAN.get(w, w) for w in NON_WORD_RE.sub(" ", text).split()]
+    return " ".join(words)
+
+
+def title_tokens(norm):
+    return {w for w in norm.split() if w not in STOPWORDS}
+
+
+def load_steam(path=STEAM_FILE):
+    """Успешно скачанные страницы Steam, по одной на игру"""
+    df = pd.read_csv(path, encoding="utf-8-sig", dtype=str)
+    if "error" in df.columns:
+        df = df[df["error"].isna()]
+    df = df[df["title"].notna()].copy()
+    df["key"] = df["url"].map(canonical_app_url)
+    df = df.drop_duplicates("key", keep="last")
+    records = []
+    for title, release, url in zip(df["title"], df["release"], df["url"]):
+        released = parse_release_date(release)
+        records.append({"title": title, "url": url, "app_id": parse_app_id(url),
+                        "year": released.year if released else None})
+    return records
+
+
+def load_rawg(path=RAWG_FILE):
+    """Игры RAWG (строки справочников в API_merged без даты выхода отбрасываются)"""
+    df = pd.read_csv(path, encoding="utf-8-sig", usecols=["id", "name", "slug", "released"])
+    df = df[df["released"].notna() & df["name"].notna()]
+    years = pd.to_datetime(df["released"], errors="coerce").dt.year
+    return [{"id": int(i), "name": n, "year": int(y) if y == y else None}
+            for i, n, y in zip(df["id"], df["name"], years)]
+
+
+class TitleIndex:
+    """Блокирующий индекс по RAWG: нормализованное название целиком и инвертированный
+    список по словам. Для строки Steam оцениваются только кандидаты, у которых есть
+    общее не слишком частое слово и близкий год выхода"""
+
+    def __init__(self, rawg):
+        self.rawg = rawg
+        self.norm = [normalize_title(r["name"]) for r in rawg]
+        self.tokens = [title_tokens(n) for n in self.norm]
+        self.exact = defaultdict(list)
+        self.postings = defaultdict(list)
+        for i, (norm, tokens) in enumerate(zip(self.norm, self.tokens)):
+            self.exact[norm].append(i)
+            for token in tokens:
+                self.postings[token].append(i)
+
+    def candidates(self, norm, tokens, year):
+        found = set(self.exact.get(norm, ()))
+        for token in tokens:
+            posting = self.postings.get(token, ())
+            if len(posting) <= MAX_POSTING:
+                found.update(posting)
+        if year is None:
+            return found
+        return {i for i in found
+                if self.rawg[i]["year"] is None or abs(self.rawg[i]["year"] - year) <= YEAR_TOLERANCE
+                or self.norm[i] == norm}
+
+    def score(self, norm, tokens, year, i):
+        """Уверенность 0..1: сходство строк, доля общих слов, совпадение года"""
+        other, other_tokens = self.norm[i], self.tokens[i]
+        if norm == other:
+            text = 1.0
+        else:
+            text = 0.7 * SequenceMatcher(None, norm, other, autojunk=False).ratio()
+            text += 0.3 * (len(tokens & other_tokens) / len(tokens | other_tokens) if tokens | other_tokens else 0)
+        other_year = self.rawg[i]["year"]
+        if year is None or other_year is None:
+            return text * 0.95
+        diff = abs(year - other_year)
+        return text if diff == 0 else text * (0.9 if diff <= YEAR_TOLERANCE else 0.75)
+
+    def match(self, record, candidates=None):
+        """Лучшая пара для строки Steam: (индекс RAWG или None, уверенность, число кандидатов)"""
+        norm = normalize_title(record["title"])
+        if not norm:
+            return None, 0.0, 0
+        tokens = title_tokens(norm)
+        if candidates is None:
+            candidates = self.candidates(norm, tokens, record["year"])
+        best, best_score = None, 0.0
+        for i in candidates:
+            score = self.score(norm, tokens, record["year"], i)
+            if score > best_score:
+                best, best_score = i, score
+        return best, best_score, len(candidates)
+
+    def match_rows(self, records):
+        rows, scored = [], 0
+        for record in records:
+            best, score, n = self.match(record)
+            scored += n
+            if best is None or score < MIN_SCORE:
+                continue
+            rawg = self.rawg[best]
+            rows.append({
+                "steam_url": record["url"], "app_id": record["app_id"], "steam_title": record["title"],
+                "steam_year": record["year"], "rawg_id": rawg["id"], "rawg_name": rawg["name"],
+                "rawg_year": rawg["year"], "confidence": round(score, 3),
+                "method": "exact" if self.norm[best] == normalize_title(record["title"]) else "fuzzy",
+            })
+        return rows, scored
+
+
+# индекс строится в каждом процессе один раз, а не передается с каждой порцией
+_INDEX = None
+
+
+def _init_worker(rawg):
+    global _INDEX
+    _INDEX = TitleIndex(rawg)
+
+
+def _match_chunk(records):
+    return _INDEX.match_rows(records)
+
+
+def match_all(steam, rawg, workers=WORKERS, chunk_size=CHUNK_SIZE):
+    """Таблица совпадений Steam -> RAWG; workers > 1 — порции строк Steam по процессам"""
+    chunks = [steam[i:i + chunk_size] for i in range(0, len(steam), chunk_size)]
+    rows, scored = [], 0
+    if workers > 1:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(rawg,)) as ex:
+            for chunk_rows, chunk_scored in ex.map(_match_chunk, chunks):
+                rows.extend(chunk_rows)
+                scored += chunk_scored
+    else:
+        index = TitleIndex(rawg)
+        for chunk in chunks:
+            chunk_rows, chunk_scored = index.match_rows(chunk)
+            rows.extend(chunk_rows)
+            scored += chunk_scored
+    return pd.DataFrame(rows), scored
+
+
+def benchmark(steam, rawg, sample=BENCH_SAMPLE, workers=WORKERS):
+    """Полный перебор пар на выборке против индекса: время, число оцененных пар
+    и доля совпадений полного перебора, которые нашел индекс"""
+    index = TitleIndex(rawg)
+    rows = random.Random(0).sample(steam, min(sample, len(steam)))
+    everything = range(len(rawg))
+    started = time.perf_counter()
+    naive = [index.match(r, everything) for r in rows]
+    naive_time = time.perf_counter() - started
+    blocked = [index.match(r) for r in rows]
+    found = sum(1 for (b, s, _), (nb, ns, _) in zip(blocked, naive) if ns >= MIN_SCORE and b == nb)
+    expected = sum(1 for _, ns, _ in naive if ns >= MIN_SCORE)
+
+    started = time.perf_counter()
+    matches, scored = match_all(steam, rawg, workers)
+    full_time = time.perf_counter() - started
+    return {
+        "steam_rows": len(steam), "rawg_rows": len(rawg),
+        "naive_pairs": len(steam) * len(rawg),
+        "naive_seconds_estimate": round(naive_time / len(rows) * len(steam), 1),
+        "indexed_pairs": scored, "indexed_seconds": round(full_time, 2),
+        "recall_on_sample": round(found / expected, 3) if expected else None,
+        "matches": len(matches),
+    }, matches
+
+
+if __name__ == "__main__":
+    steam, rawg = load_steam(), load_rawg()
+    stats, matches = benchmark(steam, rawg)
+    for key, value in stats.items():
+        print(f"- {key}: {value}")
+    matches.to_csv(MATCHES_FILE, index=False, encoding="utf-8-sig")
+    print(f"Совпадения сохранены в {MATCHES_FILE}")
@@ -0,0 +1,189 @@
+import json
+import time
+import sqlite3
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    kind TEXT NOT NULL,                      -- search / app
+    item TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'queued',    -- queued / leased / done
+    worker TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (kind, item)
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_state ON tasks(kind, state, lease_until);
+"""
+
+
+class SqliteWorkQueue:
+    """Общая очередь задач с арендой (lease): задачу берет один воркер на lease_seconds,
+    воркер продлевает аренду heartbeat'ом, брошенные задачи возвращаются в очередь"""
+
+    def __init__(self, path, lease_seconds=120):
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def _transaction(self, fn):
+        # BEGIN IMMEDIATE: аренда атомарна и между процессами на одной базе
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(self.conn)
+                self.conn.execute("COMMIT")
+                return result
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def add(self, kind, items):
+        """Добавляет задачи (повторно добавленные игнорируются); возвращает число новых"""
+        def fn(conn):
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO tasks (kind, item) VALUES (?, ?)",
+                             [(kind, item) for item in items])
+            return conn.total_changes - before
+        return self._transaction(fn)
+
+    def lease(self, kind, worker, n=1):
+        """Выдает воркеру до n задач (включая задачи с истекшей арендой)"""
+        def fn(conn):
+            now = time.time()
+            conn.execute("UPDATE tasks SET state = 'queued', worker = NULL "
+                         "WHERE kind = ? AND state = 'leased' AND lease_until < ?", (kind, now))
+            items = [row[0] for row in conn.execute(
+                "SELECT item FROM tasks WHERE kind = ? AND state = 'queued' ORDER BY rowid LIMIT ?",
+                (kind, n))]
+            conn.executemany(
+                "UPDATE tasks SET state = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1 "
+                "WHERE kind = ? AND item = ?",
+                [(worker, now + self.lease_seconds, kind, item) for item in items])
+            return items
+        return self._transaction(fn)
+
+    def heartbeat(self, worker):
+        """Продлевает аренду всех задач воркера; возвращает их число"""
+        def fn(conn):
+            cur = conn.execute("UPDATE tasks SET lease_until = ? WHERE worker = ? AND state = 'leased'",
+                               (time.time() + self.lease_seconds, worker))
+            return cur.rowcount
+        return self._transaction(fn)
+
+    def complete(self, kind, worker, items):
+        def fn(conn):
+            conn.executemany("UPDATE tasks SET state = 'done', worker = ? WHERE kind = ? AND item = ?",
+                             [(worker, kind, item) for item in items])
+        self._transaction(fn)
+
+    def release(self, kind, worker, items):
+        """Возвращает задачи в очередь (например, при остановке воркера)"""
+        def fn(conn):
+            conn.executemany("UPDATE tasks SET state = 'queued', worker = NULL "
+                             "WHERE kind = ? AND item = ? AND worker = ? AND state = 'leased'",
+                             [(kind, item, worker) for item in items])
+        self._transaction(fn)
+
+    def stats(self, kind):
+        with self._lock:
+            return dict(self.conn.execute(
+                "SELECT state, COUNT(*) FROM tasks WHERE kind = ? GROUP BY state", (kind,)))
+
+
+class HttpWorkQueue:
+    """Клиент координатора (serve): тот же интерфейс, что у SqliteWorkQueue"""
+
+    def __init__(self, url, timeout=30):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def _call(self, method, **kwargs):
+        response = self.session.post(f"{self.url}/{method}", json=kwargs, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()["result"]
+
+    def add(self, kind, items):
+        return self._call("add", kind=kind, items=list(items))
+
+    def lease(self, kind, worker, n=1):
+        return self._call("lease", kind=kind, worker=worker, n=n)
+
+    def heartbeat(self, worker):
+        return self._call("heartbeat", worker=worker)
+
+    def complete(self, kind, worker, items):
+        return self._call("complete", kind=kind, worker=worker, items=list(items))
+
+    def release(self, kind, worker, items):
+        return self._call("release", kind=kind, worker=worker, items=list(items))
+
+    def stats(self, kind):
+        return self._call("stats", kind=kind)
+
+
+class Heartbeat:
+    """Фоновый поток, который продлевает аренду задач воркера"""
+
+    def __init__(self, queue, worker, interval):
+        self.queue = queue
+        self.worker = worker
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.queue.heartbeat(self.worker)
+            except Exception as e:
+                print(f"Ошибка heartbeat {self.worker}: {e}")
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def serve(db_path="work_queue.sqlite", port=8765, lease_seconds=120):
+    """Простой HTTP-координатор поверх SqliteWorkQueue для нескольких машин"""
+    queue = SqliteWorkQueue(db_path, lease_seconds)
+    methods = {name: getattr(queue, name)
+               for name in ("add", "lease", "heartbeat", "complete", "release", "stats")}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            method = methods.get(self.path.strip("/"))
+            if method is None:
+                self.send_error(404)
+                return
+            try:
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                payload = json.dumps({"result": method(**json.loads(body or b"{}"))}).encode()
+            except Exception as e:
+                self.send_error(400, str(e))
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+    print(f"Координатор очереди: http://0.0.0.0:{port} (база {db_path})")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,34 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from async_crawl import AsyncCrawler
+from retry import RetryQueue
+
+
+def test_failed_fetch_is_retried():
+    calls = {}
+
+    def fetch(url):
+        calls[url] = calls.get(url, 0) + 1
+        if calls[url] == 1:
+            return {"url": url, "error": "429", "error_class": "rate_limited"}
+        return {"url": url, "title": "ok"}
+
+    retry = RetryQueue(max_attempts=3, base_delay=0.001, max_delay=0.01)
+    results = {}
+    AsyncCrawler(fetch, rate=1000, retry=retry).run(["https://a/1", "https://a/2"],
+                                                    lambda url, res: results.update({url: res}))
+    assert calls == {"https://a/1": 2, "https://a/2": 2}
+    assert all(not res.get("error") for res in results.values())
+    assert retry.report() == {}
+
+
+def test_final_failure_is_reported():
+    retry = RetryQueue(max_attempts=2, base_delay=0.001, max_delay=0.01)
+    results = {}
+    AsyncCrawler(lambda url: {"url": url, "error": "boom", "error_class": "other"}, rate=1000, retry=retry).run(
+        ["https://a/1"], lambda url, res: results.update({url: res}))
+    assert retry.attempts["https://a/1"] == 2
+    assert list(retry.report()) == ["other"]
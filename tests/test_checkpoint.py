@@ -0,0 +1,38 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from checkpoint import PageCheckpoint
+
+
+def test_resume_drops_unfinished_line(tmp_path):
+    path = str(tmp_path / "games.jsonl")
+    cp = PageCheckpoint(path, run_key={"a": 1})
+    cp.load()
+    cp.append(1, [{"id": 1}])
+    cp.append(2, [{"id": 2}])
+    with open(path, "ab") as f:
+        f.write(b'{"page": 3, "rec')         # строка, недописанная при падении
+    assert PageCheckpoint(path, run_key={"a": 1}).load() == (2, [{"id": 1}, {"id": 2}])
+
+
+def test_missing_jsonl_is_empty_checkpoint(tmp_path):
+    path = str(tmp_path / "games.jsonl")
+    cp = PageCheckpoint(path, run_key={"a": 1})
+    cp.load()
+    cp.append(1, [{"id": 1}])
+    os.remove(path)
+    cp = PageCheckpoint(path, run_key={"a": 1})
+    assert cp.load() == (0, [])
+    assert not os.path.exists(cp.cursor_path)
+    cp.append(1, [{"id": 5}])
+    assert PageCheckpoint(path, run_key={"a": 1}).load() == (1, [{"id": 5}])
+
+
+def test_other_run_key_starts_over(tmp_path):
+    path = str(tmp_path / "games.jsonl")
+    cp = PageCheckpoint(path, run_key={"a": 1})
+    cp.load()
+    cp.append(1, [{"id": 1}])
+    assert PageCheckpoint(path, run_key={"a": 2}).load() == (0, [])
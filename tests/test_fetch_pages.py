@@ -0,0 +1,43 @@
+import os
+import sys
+import time
+import threading
+from contextlib import closing
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from api1 import RAWGDataCollector
+
+
+def collector(max_workers=2):
+    c = RAWGDataCollector.__new__(RAWGDataCollector)
+    c.max_workers = max_workers
+    c.requested = []
+    lock = threading.Lock()
+
+    def make_request(endpoint, params=None, use_cache=True):
+        with lock:
+            c.requested.append(params["page"])
+        time.sleep(0.01 * (params["page"] % 3))     # ответы приходят не по порядку
+        return {"page": params["page"]}
+
+    c.make_request = make_request
+    return c
+
+
+def test_pages_are_yielded_in_order():
+    c = collector()
+    with closing(c.fetch_pages_ordered("games", lambda page: {"page": page}, range(1, 21))) as pages:
+        assert [page for page, _ in pages] == list(range(1, 21))
+
+
+def test_closing_cancels_remaining_pages():
+    c = collector()
+    with closing(c.fetch_pages_ordered("games", lambda page: {"page": page}, range(1, 101))) as pages:
+        for page, _ in pages:
+            if page == 3:
+                break
+    # после выхода из with новых запросов нет: загружено не больше окна за тремя страницами
+    requested = len(c.requested)
+    time.sleep(0.05)
+    assert len(c.requested) == requested <= 3 + c.max_workers * 2
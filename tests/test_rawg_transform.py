@@ -0,0 +1,77 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from api1 import RAWGDataCollector
+from rawg_transform import filter_mask, games_frame
+
+BASE = {
+    "id": 1, "name": "Half-Life", "slug": "half-life", "released": "1998-11-19",
+    "rating": 4.4, "metacritic": 96, "ratings_count": 100,
+}
+MISSING = object()   # ключ отсутствует в ответе API (в отличие от null)
+
+
+def game(**changes):
+    g = {**BASE, **changes}
+    return {k: v for k, v in g.items() if v is not MISSING}
+
+CASES = {
+    "full": game(),
+    "rating_none_metacritic_zero": game(rating=None, metacritic=0),
+    "rating_zero_no_metacritic": game(rating=0, metacritic=MISSING),
+    "no_rating_no_metacritic": game(rating=MISSING, metacritic=MISSING),
+    "rating_zero_metacritic_none": game(rating=0, metacritic=None),
+    "ratings_count_none": game(ratings_count=None),
+    "no_ratings_count": game(ratings_count=MISSING),
+    "slug_none": game(slug=None),
+    "no_slug": game(slug=MISSING),
+    "name_none": game(name=None),
+    "released_none": game(released=None),
+    "future": game(released="2031-01-01"),
+    "test_name": game(name="Engine Demo"),
+}
+
+
+@pytest.mark.parametrize("name", CASES)
+def test_filter_mask_matches_row_filter(name):
+    """Векторный фильтр отбрасывает ровно те игры, что и построчный _process_game"""
+    collector = RAWGDataCollector.__new__(RAWGDataCollector)
+    expected = collector._process_game(CASES[name]) is not None
+    assert bool(filter_mask([CASES[name]])[0]) == expected
+
+
+def test_filter_mask_none_vs_missing():
+    kept = dict(zip(CASES, filter_mask(list(CASES.values()))))
+    assert kept["rating_none_metacritic_zero"]      # null — не ноль
+    assert not kept["rating_zero_no_metacritic"]    # нет ключа — ноль
+    assert not kept["ratings_count_none"]
+    assert kept["no_slug"] and not kept["slug_none"]
+
+
+def test_games_frame_null_is_na_missing_is_default():
+    df = games_frame([game(rating=None, metacritic=0, playtime=None), game(id=2, playtime=MISSING)])
+    assert df["rating"].isna().iloc[0]
+    assert df["metacritic"].iloc[0] == 0
+    assert df["playtime"].isna().iloc[0] and df["playtime"].iloc[1] == 0
+    assert not df["tba"].iloc[1] and not pd.isna(df["tba"].iloc[1])
+
+
+def test_games_frame_nested_fields():
+    df = games_frame([
+        game(genres=[{"name": "Action"}, {"name": ""}, {"name": "Shooter"}],
+             stores=[{"store": {"name": "Steam"}}, {"store": None}],
+             tags=[{"name": f"t{i}"} for i in range(8)],
+             platforms=[{}, {}], esrb_rating={"name": "Mature"}),
+        game(id=2, genres=[], stores=None, tags=MISSING, platforms=None, esrb_rating=None),
+    ])
+    assert df["genres"].tolist()[0] == "Action, Shooter"
+    assert df["stores"].iloc[0] == "Steam"
+    assert df["tags"].iloc[0] == "t0, t1, t2, t3, t4"
+    assert df["platforms_count"].tolist() == [2, 0]
+    assert df["esrb_rating"].iloc[0] == "Mature"
+    assert df.loc[1, ["genres", "stores", "tags", "esrb_rating"]].isna().all()
@@ -0,0 +1,38 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from title_match import normalize_title
+
+
+@pytest.mark.parametrize("title, expected", [
+    # слова изданий в начале и середине названия — часть самого названия
+    ("Gold Rush", "gold rush"),
+    ("PC Building Simulator", "pc building simulator"),
+    ("Ultimate Chicken Horse", "ultimate chicken horse"),
+    ("Gold Rush: The Game", "gold rush the game"),
+    # название из одного такого слова не обнуляется
+    ("Gold", "gold"),
+    ("Director's Cut", "directors cut"),
+])
+def test_edition_words_inside_title_are_kept(title, expected):
+    assert normalize_title(title) == expected
+
+
+@pytest.mark.parametrize("title, expected", [
+    ("DOOM® Eternal: Deluxe Edition", "doom eternal"),
+    ("The Witcher 3: Wild Hunt - Game of the Year Edition", "the witcher 3 wild hunt"),
+    ("The Elder Scrolls V: Skyrim Special Edition", "the elder scrolls 5 skyrim"),
+    ("Age of Empires II (Definitive Edition)", "age of empires 2"),
+    ("Deus Ex: Human Revolution - Director's Cut", "deus ex human revolution"),
+    ("Dark Souls: Remastered", "dark souls"),
+])
+def test_edition_suffix_is_stripped(title, expected):
+    assert normalize_title(title) == expected
+
+
+def test_trademark_signs_are_dropped():
+    assert normalize_title("Portal™ 2") == "portal 2"